@@ -1,10 +1,32 @@
-"""Agents module initialization."""
-from .browser_automation import BrowserAutomationAgent
-from .form_intelligence import FormIntelligenceAgent
-from .verification_logger import VerificationLoggerAgent
+"""Agents module initialization.
+
+Agents are imported lazily on first attribute access so that importing
+one agent does not pull in the others (and Playwright) at startup.
+"""
+import importlib
+
+_LAZY_ATTRS = {
+    "BrowserAutomationAgent": ".browser_automation",
+    "get_or_create_browser": ".browser_automation",
+    "close_shared_browser": ".browser_automation",
+    "FormIntelligenceAgent": ".form_intelligence",
+    "VerificationLoggerAgent": ".verification_logger",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "BrowserAutomationAgent",
     "FormIntelligenceAgent",
     "VerificationLoggerAgent",
+    "get_or_create_browser",
+    "close_shared_browser",
 ]
@@ -1,33 +1,194 @@
 """
 Browser Automation Agent - Creates and manages stealthy browser instances.
 """
+from __future__ import annotations
+
 import os
 import json
-from typing import Optional
-from datetime import datetime
-from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
+import time
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+from urllib.parse import urlparse
 from loguru import logger
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from config import settings
 from utils import (
     get_stealthy_browser_args,
     get_context_options,
     configure_stealth_context,
+    detect_captcha,
+    file_timestamp,
+    ScreenshotWriter,
 )
 
+if TYPE_CHECKING:
+    from playwright.sync_api import Browser, BrowserContext, Page, Route
+
+
+# Local Chrome profile (Windows) with the logged-in Microsoft account
+CHROME_PROFILE_DIR = Path(os.path.expanduser("~")) / "AppData" / "Local" / "Google" / "Chrome" / "User Data" / "Default"
+
+# Subresources the form filler never needs (unless they belong to a CAPTCHA)
+BLOCKED_RESOURCE_TYPES = frozenset(['image', 'font', 'media'])
+
+# Ad/analytics domains (subdomains are blocked too)
+BLOCKED_HOSTS = frozenset([
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'connect.facebook.net',
+    'clarity.ms',
+    'hotjar.com',
+    'browser.events.data.microsoft.com',
+])
+
+
+# CAPTCHA widgets: their challenge tiles are images, and the user has to
+# solve them by hand in the same context, so these are never blocked
+CAPTCHA_HOSTS = frozenset(['hcaptcha.com'])
+RECAPTCHA_HOSTS = frozenset(['google.com', 'gstatic.com', 'recaptcha.net'])
+
+
+def _is_captcha_url(url: str) -> bool:
+    """Check whether a URL belongs to reCAPTCHA or hCaptcha."""
+    parts = urlparse(url)
+    host = parts.hostname or ''
+    is_recaptcha = parts.path.startswith('/recaptcha/')
+    while host:
+        if host in CAPTCHA_HOSTS or (is_recaptcha and host in RECAPTCHA_HOSTS):
+            return True
+        host = host.partition('.')[2]
+    return False
+
+
+def _should_block(resource_type: str, url: str) -> bool:
+    """Decide whether the route filter aborts a request."""
+    if _is_blocked_host(url):
+        return True
+    return resource_type in BLOCKED_RESOURCE_TYPES and not _is_captcha_url(url)
+
+
+def _is_blocked_host(url: str) -> bool:
+    """Check URL host and its parent domains against BLOCKED_HOSTS."""
+    host = urlparse(url).hostname or ''
+    while host:
+        if host in BLOCKED_HOSTS:
+            return True
+        host = host.partition('.')[2]
+    return False
+
+
+def _route_filter(route: Route) -> None:
+    """Abort heavy or tracking requests, let everything else through."""
+    request = route.request
+    if _should_block(request.resource_type, request.url):
+        route.abort()
+    else:
+        route.continue_()
+
+
+def _read_json(path: str):
+    """Load JSON file (orjson if installed)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data) -> None:
+    """Write compact JSON file (orjson if installed)."""
+    if ORJSON_AVAILABLE:
+        Path(path).write_bytes(orjson.dumps(data))
+        return
+    with open(path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+
+
+# Process-wide browser shared between agents (see get_or_create_browser)
+_shared_playwright = None
+_shared_browser: Optional[Browser] = None
+
+
+def get_or_create_browser() -> Browser:
+    """
+    Launch the shared Chromium browser on first use and return it.
+    
+    Agents created with this browser only open their own context,
+    so the browser process and Playwright driver start once.
+    
+    Returns:
+        Shared Browser instance
+    """
+    global _shared_playwright, _shared_browser
+    
+    if _shared_browser is None:
+        from playwright.sync_api import sync_playwright
+        
+        logger.info("🚀 Launching shared browser...")
+        _shared_playwright = sync_playwright().start()
+        _shared_browser = _shared_playwright.chromium.launch(
+            headless=settings.headless_mode,
+            args=get_stealthy_browser_args(),
+            slow_mo=settings.debug_slow_mo_ms,
+        )
+    return _shared_browser
+
+
+def close_shared_browser() -> None:
+    """Close the shared browser and stop its Playwright driver."""
+    global _shared_playwright, _shared_browser
+    
+    if _shared_browser:
+        _shared_browser.close()
+        _shared_browser = None
+    
+    if _shared_playwright:
+        _shared_playwright.stop()
+        _shared_playwright = None
+
 
 class BrowserAutomationAgent:
     """
     Manages browser automation with anti-detection features.
     """
     
-    def __init__(self):
-        """Initialize browser automation agent."""
+    # Minimum seconds between non-forced session saves
+    _SESSION_SAVE_INTERVAL = 5.0
+    
+    def __init__(
+        self,
+        shared_browser: Optional[Browser] = None,
+        cdp_url: Optional[str] = None
+    ):
+        """
+        Initialize browser automation agent.
+        
+        Args:
+            shared_browser: Existing browser to open a context in (optional)
+            cdp_url: CDP endpoint of a running browser to connect to (optional)
+        """
+        self.shared_browser = shared_browser
+        self.cdp_url = cdp_url
+        self._owns_browser = False
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.session_file = os.path.join(settings.data_dir, "browser_session.json")
+        self._last_session_save = 0.0
+        
+        # Checked once here so start() does not stat the profile again
+        self._use_chrome_profile = CHROME_PROFILE_DIR.exists()
+        
+        # Background file writes (screenshots) off the automation thread
+        self.screenshot_writer = ScreenshotWriter()
     
     def start(self) -> None:
         """
@@ -36,14 +197,28 @@ class BrowserAutomationAgent:
         """
         logger.info("🚀 Starting browser automation agent...")
         
+        # Reuse an existing browser - only a new context is created
+        if self.shared_browser is not None:
+            logger.info("Using shared browser...")
+            self.browser = self.shared_browser
+            self._create_context()
+            logger.success("✅ Browser started successfully")
+            return
+        
+        from playwright.sync_api import sync_playwright
+        
         self.playwright = sync_playwright().start()
         
+        if self.cdp_url:
+            logger.info(f"🔌 Connecting to browser at {self.cdp_url}...")
+            self.browser = self.playwright.chromium.connect_over_cdp(self.cdp_url)
+            self._create_context()
+            logger.success("✅ Browser started successfully")
+            return
+        
         # IMPORTANT: Use Chrome profile directory for persistent authentication
         # This allows using the existing Chrome profile with logged-in Microsoft account
-        chrome_profile = os.path.expanduser("~\\AppData\\Local\\Google\\Chrome\\User Data\\Default")
-        
-        # Check if Chrome profile exists
-        use_chrome_profile = os.path.exists(chrome_profile)
+        use_chrome_profile = self._use_chrome_profile
         
         if use_chrome_profile:
             logger.info("🔐 Using Chrome Default profile for authentication...")
@@ -55,11 +230,11 @@ class BrowserAutomationAgent:
                 logger.info("Ensuring Chrome is closed...")
                 
                 self.browser = self.playwright.chromium.launch_persistent_context(
-                    user_data_dir=os.path.dirname(chrome_profile),  # User Data folder
+                    user_data_dir=os.fspath(CHROME_PROFILE_DIR.parent),  # User Data folder
                     headless=False,  # Persistent context doesn't support headless
                     channel='chrome',  # Use installed Chrome
                     args=get_stealthy_browser_args(),
-                    slow_mo=50,
+                    slow_mo=settings.debug_slow_mo_ms,
                     locale=settings.browser_locale,
                     timezone_id=settings.browser_timezone,
                     no_viewport=False,
@@ -67,6 +242,8 @@ class BrowserAutomationAgent:
                 
                 # For persistent context, browser IS the context
                 self.context = self.browser
+                self._owns_browser = True
+                self._install_route_filter()
                 
                 # Get or create first page
                 if len(self.browser.pages) > 0:
@@ -88,67 +265,97 @@ class BrowserAutomationAgent:
             self.browser = self.playwright.chromium.launch(
                 headless=settings.headless_mode,
                 args=get_stealthy_browser_args(),
-                slow_mo=50 if not settings.headless_mode else 0,
-            )
-            
-            # Create context with stealth config
-            context_opts = get_context_options(
-                locale=settings.browser_locale,
-                timezone=settings.browser_timezone
+                slow_mo=settings.debug_slow_mo_ms,
             )
-            
-            # Load saved session if exists
-            if os.path.exists(self.session_file):
-                logger.info("📂 Loading saved browser session...")
-                try:
-                    with open(self.session_file, 'r') as f:
-                        session_data = json.load(f)
-                    context_opts['storage_state'] = session_data
-                except Exception as e:
-                    logger.warning(f"Could not load session: {e}")
-            
-            # Create context
-            self.context = self.browser.new_context(**context_opts)
-            
-            # Apply stealth measures
-            configure_stealth_context(self.context)
-            
-            # Create page if not already created
-            if not self.page:
-                # Enable video recording if configured
-                if settings.save_video_recording:
-                    self.context = self.browser.new_context(
-                        **context_opts,
-                        record_video_dir=os.path.join(settings.logs_dir, "videos")
-                    )
-                    configure_stealth_context(self.context)
-                
-                self.page = self.context.new_page()
+            self._owns_browser = True
+            self._create_context()
         
         logger.success("✅ Browser started successfully")
     
-    def save_session(self) -> None:
+    def _create_context(self) -> None:
+        """
+        Create a stealth-configured context and page on self.browser.
+        Restores the saved session if available.
+        """
+        # Create context with stealth config
+        context_opts = get_context_options(
+            locale=settings.browser_locale,
+            timezone=settings.browser_timezone
+        )
+        
+        # Load saved session if exists
+        if os.path.exists(self.session_file):
+            logger.info("📂 Loading saved browser session...")
+            try:
+                session_data = _read_json(self.session_file)
+                context_opts['storage_state'] = session_data
+            except Exception as e:
+                logger.warning(f"Could not load session: {e}")
+        
+        # Enable video recording if configured
+        if settings.save_video_recording:
+            context_opts['record_video_dir'] = os.path.join(settings.logs_dir, "videos")
+        
+        # Create context
+        self.context = self.browser.new_context(**context_opts)
+        
+        # Apply stealth measures
+        configure_stealth_context(self.context)
+        self._install_route_filter()
+        
+        # Create page if not already created
+        if not self.page:
+            self.page = self.context.new_page()
+    
+    def _install_route_filter(self) -> None:
+        """
+        Block images/fonts/media and ad hosts if configured.
+        
+        Note that routing disables Playwright's HTTP cache for the context.
+        """
+        if settings.block_heavy_resources:
+            self.context.route('**/*', _route_filter)
+    
+    def save_session(self, force: bool = False) -> None:
         """
         Save browser session (cookies, localStorage, etc.)
+        
+        Args:
+            force: Save even if the last save was less than 5 seconds ago
         """
         if not self.context:
             return
         
+        now = time.monotonic()
+        if not force and now - self._last_session_save < self._SESSION_SAVE_INTERVAL:
+            return
+        
         try:
             session_data = self.context.storage_state()
-            with open(self.session_file, 'w') as f:
-                json.dump(session_data, f, indent=2)
+            
+            # Write to temp file first so a crash never leaves a torn session
+            tmp_file = self.session_file + ".tmp"
+            _write_json(tmp_file, session_data)
+            os.replace(tmp_file, self.session_file)
+            
+            self._last_session_save = now
             logger.debug("💾 Browser session saved")
         except Exception as e:
             logger.warning(f"Could not save session: {e}")
     
-    def navigate_to(self, url: str, wait_for: str = 'networkidle') -> bool:
+    def navigate_to(
+        self,
+        url: str,
+        wait_for: str = 'domcontentloaded',
+        ready_selector: Optional[str] = None
+    ) -> bool:
         """
         Navigate to URL with error handling.
         
         Args:
             url: URL to navigate to
             wait_for: Wait condition ('load', 'domcontentloaded', 'networkidle')
+            ready_selector: Selector to wait for after navigation (optional)
             
         Returns:
             True if navigation successful
@@ -159,12 +366,20 @@ class BrowserAutomationAgent:
         
         try:
             logger.info(f"🌐 Navigating to: {url}")
-            self.page.goto(url, wait_until=wait_for, timeout=30000)
-            logger.success("✅ Navigation complete")
-            return True
+            self.page.goto(url, wait_until=wait_for, timeout=15000)
         except Exception as e:
             logger.error(f"Navigation failed: {e}")
             return False
+        
+        if ready_selector:
+            try:
+                self.page.wait_for_selector(ready_selector, timeout=15000)
+            except Exception as e:
+                # Not fatal - login redirects may still be in progress
+                logger.warning(f"Ready selector not found: {e}")
+        
+        logger.success("✅ Navigation complete")
+        return True
     
     def take_screenshot(self, name: str = "screenshot") -> str:
         """
@@ -179,14 +394,19 @@ class BrowserAutomationAgent:
         if not self.page:
             return ""
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp}_{name}.png"
+        timestamp = file_timestamp()
+        is_jpeg = settings.screenshot_format == "jpeg"
+        filename = f"{timestamp}_{name}.{'jpg' if is_jpeg else 'png'}"
         filepath = os.path.join(settings.logs_dir, filename)
         
         try:
-            os.makedirs(settings.logs_dir, exist_ok=True)
-            self.page.screenshot(path=filepath, full_page=True)
-            logger.debug(f"📸 Screenshot saved: {filename}")
+            data = self.page.screenshot(
+                type=settings.screenshot_format,
+                quality=settings.screenshot_quality if is_jpeg else None,
+                full_page=settings.screenshot_full_page,
+            )
+            self.screenshot_writer.submit(filepath, data)
+            logger.debug(f"📸 Screenshot queued: {filename}")
             return filepath
         except Exception as e:
             logger.error(f"Screenshot failed: {e}")
@@ -199,28 +419,47 @@ class BrowserAutomationAgent:
         Returns:
             True if CAPTCHA detected
         """
+        reason = self._detect_captcha()
+        if reason:
+            logger.warning(f"🔴 CAPTCHA detected ({reason})")
+            return True
+        return False
+    
+    def _detect_captcha(self) -> Optional[str]:
+        """Return what gave the CAPTCHA away, or None if there is none."""
         if not self.page:
-            return False
+            return None
         
         try:
-            # Check for reCAPTCHA
-            recaptcha = self.page.locator('iframe[src*="recaptcha"]').count()
-            if recaptcha > 0:
-                logger.warning("🔴 reCAPTCHA detected")
-                return True
-            
-            # Check for other CAPTCHA indicators
-            captcha_keywords = ['captcha', 'robot', 'verify you are human']
-            page_text = self.page.inner_text('body').lower()
-            
-            for keyword in captcha_keywords:
-                if keyword in page_text:
-                    logger.warning(f"🔴 CAPTCHA detected (keyword: {keyword})")
-                    return True
-            
-            return False
+            # Widgets and keywords are checked in one in-browser evaluation
+            return detect_captcha(self.page) or None
         except:
-            return False
+            return None
+    
+    def wait_for_captcha_cleared(self, timeout: float = 120.0) -> bool:
+        """
+        Poll until the CAPTCHA is gone, backing off from 1s to 8s.
+        
+        Meant to be called after check_captcha() found one, so the
+        first re-check happens after the first backoff step.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the CAPTCHA cleared within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        delay = 1.0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # Playwright keeps servicing browser events while it waits
+            self.page.wait_for_timeout(min(delay, remaining) * 1000)
+            if not self._detect_captcha():
+                return True
+            delay = min(delay * 1.5, 8.0)
     
     def get_dom_snapshot(self) -> str:
         """
@@ -244,17 +483,21 @@ class BrowserAutomationAgent:
         """
         logger.info("🛑 Closing browser...")
         
-        self.save_session()
+        self.save_session(force=True)
         
         if self.context:
             self.context.close()
         
-        if self.browser:
+        # Shared/CDP browsers are left running for their owner
+        if self.browser and self._owns_browser:
             self.browser.close()
         
         if self.playwright:
             self.playwright.stop()
         
+        # Finish pending screenshot writes
+        self.screenshot_writer.close()
+        
         logger.success("✅ Browser closed")
     
     def __enter__(self):
@@ -1,14 +1,23 @@
 """
 Form Intelligence Agent - Analyzes forms and identifies fields.
 """
-from typing import Optional
-from playwright.sync_api import Page
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Optional, TYPE_CHECKING
 from loguru import logger
 
 from database.models import FieldMapping, FormProvider
-from plugins import ALL_PLUGINS
+from plugins import dispatch, get_plugins
 from plugins.base import FormProviderPlugin
 
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+
+# Most recent URLs whose provider lookup is cached (least recently used go first)
+IDENTIFY_CACHE_MAX = 256
+
 
 class FormIntelligenceAgent:
     """
@@ -17,8 +26,14 @@ class FormIntelligenceAgent:
     
     def __init__(self):
         """Initialize form intelligence agent."""
-        self.plugins = ALL_PLUGINS
-        logger.info(f"🧠 Form Intelligence Agent initialized with {len(self.plugins)} plugins")
+        # URL -> plugin for repeat lookups (retries, verification), bounded
+        self._identify_cache: OrderedDict[str, Optional[FormProviderPlugin]] = OrderedDict()
+        logger.info("🧠 Form Intelligence Agent initialized")
+    
+    @property
+    def plugins(self) -> list[FormProviderPlugin]:
+        """All registered plugins (instantiates any not yet dispatched to)."""
+        return get_plugins()
     
     def identify_provider(self, url: str) -> Optional[FormProviderPlugin]:
         """
@@ -30,13 +45,20 @@ class FormIntelligenceAgent:
         Returns:
             Plugin instance if found, None otherwise
         """
-        for plugin in self.plugins:
-            if plugin.can_handle(url):
-                logger.info(f"✅ Provider identified: {plugin.provider_name.value}")
-                return plugin
+        if url in self._identify_cache:
+            self._identify_cache.move_to_end(url)
+            plugin = self._identify_cache[url]
+        else:
+            plugin = dispatch(url)
+            self._identify_cache[url] = plugin
+            if len(self._identify_cache) > IDENTIFY_CACHE_MAX:
+                self._identify_cache.popitem(last=False)
         
-        logger.warning(f"⚠️  No plugin found for URL: {url}")
-        return None
+        if plugin:
+            logger.info(f"✅ Provider identified: {plugin.provider_name.value}")
+        else:
+            logger.warning(f"⚠️  No plugin found for URL: {url}")
+        return plugin
     
     def analyze_form(
         self,
@@ -64,6 +86,10 @@ class FormIntelligenceAgent:
         # Analyze with plugin
         field_mapping = plugin.analyze_form(page)
         
+        if field_mapping:
+            # The model does not range-check confidence; keep it in [0, 1] here
+            field_mapping.confidence = max(0.0, min(1.0, field_mapping.confidence))
+        
         if field_mapping and field_mapping.is_complete():
             logger.success(
                 f"✅ Form analyzed successfully - "
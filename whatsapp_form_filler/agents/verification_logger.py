@@ -1,11 +1,17 @@
 """
 Verification & Logging Agent - Verifies submissions and maintains audit trail.
 """
+from __future__ import annotations
+
 import os
+import queue
+import re
 import sqlite3
-from datetime import datetime
-from typing import Optional
-from playwright.sync_api import Page
+import threading
+from concurrent.futures import Future, wait
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
 from loguru import logger
 
 from config import settings
@@ -15,7 +21,24 @@ from database.models import (
     DetectionMethod,
     FormProvider,
 )
-from utils import NotificationManager
+from database.compression import compress_dom, decompress_dom
+from utils import NotificationManager, find_captcha_keyword
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+
+_SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database" / "schema.sql"
+
+# Failed pages are only classified as CAPTCHA on an explicit mention
+_CAPTCHA_TEXT_RE = re.compile('captcha', re.IGNORECASE)
+
+
+def _log_saved(future: Future) -> None:
+    """Report the outcome of a submission write that nobody waited for."""
+    error = future.exception()
+    if error is None:
+        logger.info(f"📝 Submission logged with ID: {future.result()}")
 
 
 class VerificationLoggerAgent:
@@ -23,6 +46,50 @@ class VerificationLoggerAgent:
     Handles submission verification, logging, and notifications.
     """
     
+    _INSERT_SQL = """
+        INSERT INTO form_submissions (
+            timestamp, form_url, form_provider, detection_method,
+            confidence_score, student_name, student_id, status,
+            error_message, screenshot_before, screenshot_filled,
+            screenshot_after, dom_snapshot, dom_snapshot_blob,
+            processing_time_seconds
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    _STATS_SQL = """
+        SELECT 
+            COUNT(*) as total,
+            SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as successful,
+            SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed,
+            SUM(CASE WHEN status = 'captcha' THEN 1 ELSE 0 END) as captcha,
+            AVG(processing_time_seconds) as avg_time
+        FROM form_submissions
+        WHERE DATE(timestamp) = ?
+    """
+    
+    # Adds a batch's counts to its day's row; avg is re-weighted by count
+    _STATS_UPSERT_SQL = """
+        INSERT INTO system_stats (
+            date, total_forms_processed, successful_submissions,
+            failed_submissions, captcha_triggered, avg_processing_time_seconds,
+            ai_fallback_used, rule_based_success
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(date) DO UPDATE SET
+            avg_processing_time_seconds = (
+                avg_processing_time_seconds * total_forms_processed
+                + excluded.avg_processing_time_seconds * excluded.total_forms_processed
+            ) / (total_forms_processed + excluded.total_forms_processed),
+            total_forms_processed = total_forms_processed + excluded.total_forms_processed,
+            successful_submissions = successful_submissions + excluded.successful_submissions,
+            failed_submissions = failed_submissions + excluded.failed_submissions,
+            captcha_triggered = captcha_triggered + excluded.captcha_triggered,
+            ai_fallback_used = ai_fallback_used + excluded.ai_fallback_used,
+            rule_based_success = rule_based_success + excluded.rule_based_success
+    """
+    
+    # Max rows committed in a single writer transaction
+    _WRITE_BATCH_SIZE = 50
+    
     def __init__(self, notification_manager: NotificationManager):
         """
         Initialize verification logger agent.
@@ -32,44 +99,52 @@ class VerificationLoggerAgent:
         """
         self.notification_manager = notification_manager
         self.db_path = settings.database_path
+        self._db_lock = threading.Lock()
         self._init_database()
+        
+        # Single writer thread batches inserts into one transaction
+        self._write_q: queue.Queue = queue.Queue()
+        self._last_future: Optional[Future] = None
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
         logger.info("📝 Verification & Logging Agent initialized")
     
     def _init_database(self) -> None:
-        """Initialize SQLite database."""
-        os.makedirs(settings.data_dir, exist_ok=True)
+        """Initialize SQLite database and open the shared connection."""
+        is_new = not os.path.exists(self.db_path)
+        
+        # One long-lived connection for all reads/writes (WAL mode)
+        self._conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA mmap_size=134217728")
         
         # Read and execute schema if database is new
-        if not os.path.exists(self.db_path):
+        if is_new:
             logger.info("Creating database...")
-            schema_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                "database",
-                "schema.sql"
-            )
-            
-            if os.path.exists(schema_path):
-                with open(schema_path, 'r') as f:
-                    schema_sql = f.read()
+            if _SCHEMA_PATH.exists():
+                schema_sql = _SCHEMA_PATH.read_text()
                 
-                conn = sqlite3.connect(self.db_path)
-                conn.executescript(schema_sql)
-                conn.close()
+                self._conn.executescript(schema_sql)
                 logger.success("✅ Database created")
             else:
-                logger.error(f"Schema file not found: {schema_path}")
-    
-    def create_log_directory(self) -> str:
-        """
-        Create timestamped log directory for current submission.
+                logger.error(f"Schema file not found: {_SCHEMA_PATH}")
         
-        Returns:
-            Path to log directory
-        """
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        log_dir = os.path.join(settings.logs_dir, timestamp)
-        os.makedirs(log_dir, exist_ok=True)
-        return log_dir
+        # Databases created before DOM snapshots moved into the table
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(form_submissions)")}
+        if "dom_snapshot_blob" not in columns:
+            self._conn.execute("ALTER TABLE form_submissions ADD COLUMN dom_snapshot_blob BLOB")
+        
+        # Daily stats filter on DATE(timestamp); index it for existing databases too
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_submissions_date "
+            "ON form_submissions(DATE(timestamp))"
+        )
     
     def verify_and_log(
         self,
@@ -83,8 +158,10 @@ class VerificationLoggerAgent:
         screenshots: dict[str, str],
         processing_time: float,
         is_successful: bool,
-        error_message: Optional[str] = None
-    ) -> int:
+        error_message: Optional[str] = None,
+        timestamp: Optional[datetime] = None,
+        wait: bool = True
+    ) -> Optional[int]:
         """
         Verify submission and log to database.
         
@@ -100,9 +177,11 @@ class VerificationLoggerAgent:
             processing_time: Time taken in seconds
             is_successful: Whether submission was successful
             error_message: Error message if failed
+            timestamp: Submission time (defaults to now)
+            wait: Block until the row is written (False returns right after queueing)
             
         Returns:
-            Submission ID from database
+            Submission ID from database, or None if not waiting
         """
         logger.info("🔍 Verifying submission...")
         
@@ -112,25 +191,24 @@ class VerificationLoggerAgent:
             logger.success("✅ Submission verified as successful")
         else:
             # Check if CAPTCHA
-            page_text = page.inner_text('body')
-            if 'captcha' in page_text.lower():
+            if find_captcha_keyword(page, _CAPTCHA_TEXT_RE):
                 status = SubmissionStatus.CAPTCHA
                 logger.warning("🔴 CAPTCHA detected")
             else:
                 status = SubmissionStatus.FAILED
                 logger.error("❌ Submission failed")
         
-        # Get DOM snapshot
-        dom_snapshot = page.content()
-        
-        # Save DOM to file
-        log_dir = self.create_log_directory()
-        dom_path = os.path.join(log_dir, "dom_snapshot.html")
-        with open(dom_path, 'w', encoding='utf-8') as f:
-            f.write(dom_snapshot)
+        # Capture DOM snapshot (stored compressed in the database row)
+        dom_blob = None
+        if status != SubmissionStatus.SUCCESS or settings.save_dom_on_success:
+            try:
+                dom_blob = compress_dom(page.content())
+            except Exception as e:
+                logger.warning(f"Could not capture DOM snapshot: {e}")
         
         # Create submission record
-        submission = FormSubmission(
+        submission = FormSubmission.fast_new(
+            timestamp=timestamp or datetime.now(),
             form_url=form_url,
             form_provider=provider,
             detection_method=detection_method,
@@ -142,12 +220,14 @@ class VerificationLoggerAgent:
             screenshot_before=screenshots.get('before', ''),
             screenshot_filled=screenshots.get('filled', ''),
             screenshot_after=screenshots.get('after', ''),
-            dom_snapshot=dom_path,
+            dom_snapshot_blob=dom_blob,
             processing_time_seconds=processing_time,
         )
         
-        # Save to database
-        submission_id = self._save_to_database(submission)
+        # Save to database (the writer thread inserts it)
+        future = self._queue_submission(submission)
+        if not wait:
+            future.add_done_callback(_log_saved)
         
         # Send notifications
         if status == SubmissionStatus.SUCCESS:
@@ -165,12 +245,31 @@ class VerificationLoggerAgent:
                 error_message=error_message
             )
         
+        if not wait:
+            return None
+        
+        submission_id = future.result()
         logger.info(f"📝 Submission logged with ID: {submission_id}")
         return submission_id
     
+    def _queue_submission(self, submission: FormSubmission) -> Future:
+        """
+        Queue submission for the writer thread.
+        
+        Args:
+            submission: FormSubmission model
+            
+        Returns:
+            Future resolving to the submission ID
+        """
+        future: Future = Future()
+        self._write_q.put((submission, future))
+        self._last_future = future
+        return future
+    
     def _save_to_database(self, submission: FormSubmission) -> int:
         """
-        Save submission to database.
+        Queue submission for the writer thread and wait for its ID.
         
         Args:
             submission: FormSubmission model
@@ -178,17 +277,12 @@ class VerificationLoggerAgent:
         Returns:
             Submission ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO form_submissions (
-                timestamp, form_url, form_provider, detection_method,
-                confidence_score, student_name, student_id, status,
-                error_message, screenshot_before, screenshot_filled,
-                screenshot_after, dom_snapshot, processing_time_seconds
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        return self._queue_submission(submission).result()
+    
+    @staticmethod
+    def _submission_row(submission: FormSubmission) -> tuple:
+        """Convert submission to an INSERT parameter tuple."""
+        return (
             submission.timestamp.isoformat(),
             submission.form_url,
             submission.form_provider.value,
@@ -202,14 +296,109 @@ class VerificationLoggerAgent:
             submission.screenshot_filled,
             submission.screenshot_after,
             submission.dom_snapshot,
+            submission.dom_snapshot_blob,
             submission.processing_time_seconds,
-        ))
+        )
+    
+    @staticmethod
+    def _stats_rows(submissions: list[FormSubmission]) -> list[tuple]:
+        """Aggregate a batch of submissions into per-day system_stats upserts."""
+        days: dict[str, list] = {}
+        for sub in submissions:
+            day = sub.timestamp.date().isoformat()
+            counts = days.setdefault(day, [0, 0, 0, 0, 0.0, 0, 0])
+            counts[0] += 1
+            if sub.status == SubmissionStatus.SUCCESS:
+                counts[1] += 1
+                if sub.detection_method == DetectionMethod.RULE_BASED:
+                    counts[6] += 1
+            elif sub.status == SubmissionStatus.FAILED:
+                counts[2] += 1
+            elif sub.status == SubmissionStatus.CAPTCHA:
+                counts[3] += 1
+            counts[4] += sub.processing_time_seconds or 0.0
+            if sub.detection_method == DetectionMethod.AI_ASSISTED:
+                counts[5] += 1
         
-        submission_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        return [
+            (day, total, ok, failed, captcha, time_sum / total, ai, rule_ok)
+            for day, (total, ok, failed, captcha, time_sum, ai, rule_ok) in days.items()
+        ]
+    
+    def _writer_loop(self) -> None:
+        """
+        Drain queued submissions and insert them in batches.
+        Daily system_stats are updated in the same transaction.
+        A None item stops the loop.
+        """
+        running = True
+        while running:
+            item = self._write_q.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            while len(batch) < self._WRITE_BATCH_SIZE:
+                try:
+                    item = self._write_q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            
+            try:
+                rows = [self._submission_row(sub) for sub, _ in batch]
+                stats_rows = self._stats_rows([sub for sub, _ in batch])
+                with self._db_lock:
+                    self._conn.execute("BEGIN")
+                    try:
+                        self._conn.executemany(self._INSERT_SQL, rows)
+                        last_id = self._conn.execute(
+                            "SELECT last_insert_rowid()"
+                        ).fetchone()[0]
+                        self._conn.executemany(self._STATS_UPSERT_SQL, stats_rows)
+                        self._conn.execute("COMMIT")
+                    except Exception:
+                        self._conn.execute("ROLLBACK")
+                        raise
+            except Exception as e:
+                logger.error(f"Could not save submissions: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            # AUTOINCREMENT IDs are consecutive within one transaction
+            n = len(batch)
+            for i, (_, future) in enumerate(batch):
+                future.set_result(last_id - (n - i - 1))
+    
+    def get_dom_snapshot(self, submission_id: int) -> Optional[str]:
+        """
+        Load and decompress the DOM snapshot of a submission.
         
-        return submission_id
+        Args:
+            submission_id: Submission ID from database
+            
+        Returns:
+            HTML content, or None if no snapshot was stored
+        """
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT dom_snapshot_blob FROM form_submissions WHERE id = ?",
+                (submission_id,)
+            ).fetchone()
+        
+        if not row or row[0] is None:
+            return None
+        return decompress_dom(row[0])
+    
+    def flush(self) -> None:
+        """Block until every queued submission has been written."""
+        # Batches are committed in queue order, so the last future finishes last
+        if self._last_future is not None:
+            wait([self._last_future])
     
     def get_daily_stats(self) -> dict:
         """
@@ -218,24 +407,12 @@ class VerificationLoggerAgent:
         Returns:
             Dictionary with stats
         """
-        today = datetime.now().date().isoformat()
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as successful,
-                SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed,
-                SUM(CASE WHEN status = 'captcha' THEN 1 ELSE 0 END) as captcha,
-                AVG(processing_time_seconds) as avg_time
-            FROM form_submissions
-            WHERE DATE(timestamp) = ?
-        """, (today,))
+        today = date.today().isoformat()
+        self.flush()
         
-        row = cursor.fetchone()
-        conn.close()
+        with self._db_lock:
+            cursor = self._conn.execute(self._STATS_SQL, (today,))
+            row = cursor.fetchone()
         
         return {
             'total': row[0] or 0,
@@ -244,3 +421,11 @@ class VerificationLoggerAgent:
             'captcha': row[3] or 0,
             'avg_processing_time': row[4] or 0.0,
         }
+    
+    def close(self) -> None:
+        """
+        Flush pending writes and close the shared database connection.
+        """
+        self._write_q.put(None)
+        self._writer.join()
+        self._conn.close()
@@ -3,7 +3,8 @@ Configuration management using Pydantic Settings.
 Loads from environment variables and .env file.
 """
 import os
-from typing import Optional
+from functools import cached_property
+from typing import Any, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
 
@@ -36,9 +37,18 @@ class Settings(BaseSettings):
     headless_mode: bool = Field(False, description="Run browser in headless mode")
     screenshot_on_success: bool = Field(True, description="Take screenshot on success")
     screenshot_on_error: bool = Field(True, description="Take screenshot on error")
+    screenshot_format: Literal["jpeg", "png"] = Field("jpeg", description="Screenshot image format")
+    screenshot_quality: int = Field(60, ge=0, le=100, description="JPEG screenshot quality")
+    screenshot_full_page: bool = Field(False, description="Capture full scrollable page (debugging)")
     save_video_recording: bool = Field(False, description="Save video recordings")
+    save_dom_on_success: bool = Field(False, description="Save DOM snapshot for successful submissions")
+    block_heavy_resources: bool = Field(False, description="Block images, fonts, media and ad hosts (disables the HTTP cache)")
     browser_locale: str = Field("tr-TR", description="Browser locale")
     browser_timezone: str = Field("Europe/Istanbul", description="Browser timezone")
+    debug_slow_mo_ms: int = Field(0, ge=0, description="Delay before each browser action in ms (debugging only)")
+    stealth_level: Literal["off", "low", "high"] = Field(
+        "high", description="Human-like pauses in watch_whatsapp: full (high), quarter (low) or none (off)"
+    )
     
     # ============================================
     # RATE LIMITING
@@ -76,7 +86,8 @@ class Settings(BaseSettings):
         env_file="../.env",  # Look in parent directory
         env_file_encoding="utf-8",
         case_sensitive=False,
-        extra="ignore"
+        extra="ignore",
+        frozen=True,  # Settings never change at runtime
     )
     
     @field_validator('log_level')
@@ -88,31 +99,35 @@ class Settings(BaseSettings):
             raise ValueError(f"Log level must be one of {valid_levels}")
         return v_upper
     
-    @property
+    def model_post_init(self, __context: Any) -> None:
+        """Create log/data directories once at startup."""
+        os.makedirs(self.logs_dir, exist_ok=True)
+        os.makedirs(self.data_dir, exist_ok=True)
+    
+    # Derived values are computed once and then read as plain attributes
+    # (the model is frozen, so they can never go stale)
+    
+    @cached_property
     def logs_dir(self) -> str:
         """Directory for log files."""
-        path = os.path.join(self.project_root, "logs")
-        os.makedirs(path, exist_ok=True)
-        return path
+        return os.path.join(self.project_root, "logs")
     
-    @property
+    @cached_property
     def data_dir(self) -> str:
         """Directory for data files."""
-        path = os.path.join(self.project_root, "data")
-        os.makedirs(path, exist_ok=True)
-        return path
+        return os.path.join(self.project_root, "data")
     
-    @property
+    @cached_property
     def database_path(self) -> str:
         """Path to SQLite database."""
         return os.path.join(self.data_dir, "whatsapp_form_filler.db")
     
-    @property
+    @cached_property
     def has_telegram(self) -> bool:
         """Check if Telegram notifications are configured."""
         return bool(self.telegram_bot_token and self.telegram_chat_id)
     
-    @property
+    @cached_property
     def has_openai(self) -> bool:
         """Check if OpenAI is configured."""
         return bool(self.openai_api_key and self.openai_api_key != "your_openai_api_key_here")
@@ -13,6 +13,8 @@ from .models import (
     UserData,
     FieldMapping,
 )
+from .compression import compress_dom, decompress_dom
+from .serialization import dump_json, load_json
 
 __all__ = [
     "FormProvider",
@@ -27,4 +29,8 @@ __all__ = [
     "SystemStats",
     "UserData",
     "FieldMapping",
+    "compress_dom",
+    "decompress_dom",
+    "dump_json",
+    "load_json",
 ]
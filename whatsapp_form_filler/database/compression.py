@@ -0,0 +1,32 @@
+"""
+DOM snapshot compression for the form_submissions table.
+"""
+import gzip
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def compress_dom(html: str) -> bytes:
+    """Compress HTML for the dom_snapshot_blob column (zstd if installed, else gzip)."""
+    data = html.encode('utf-8')
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress_dom(blob: bytes) -> str:
+    """Decompress a stored DOM snapshot (format detected from the header)."""
+    if blob[:4] == _ZSTD_MAGIC:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is required to read this DOM snapshot")
+        data = zstandard.ZstdDecompressor().decompress(blob)
+    else:
+        data = gzip.decompress(blob)
+    return data.decode('utf-8')
@@ -1,13 +1,21 @@
 """
 Database models using Pydantic for type safety and validation.
 """
-from datetime import datetime
-from typing import Optional, Dict, Any
-from enum import Enum
-from pydantic import BaseModel, Field, field_validator
+from datetime import date as Date, datetime
+from typing import Optional, Dict, Any, Self
+from enum import StrEnum
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+from .compression import decompress_dom
+from .serialization import dump_json, load_json
 
-class FormProvider(str, Enum):
+
+# Required FieldMapping selectors, in presence_mask bit order
+_FIELD_NAMES = ('name_field', 'student_id_field', 'attendance_checkbox', 'submit_button')
+_ALL_FIELDS_MASK = (1 << len(_FIELD_NAMES)) - 1
+
+
+class FormProvider(StrEnum):
     """Supported form providers."""
     MICROSOFT_FORMS = "microsoft_forms"
     GOOGLE_FORMS = "google_forms"
@@ -15,14 +23,14 @@ class FormProvider(str, Enum):
     UNKNOWN = "unknown"
 
 
-class DetectionMethod(str, Enum):
+class DetectionMethod(StrEnum):
     """How the form was analyzed."""
     RULE_BASED = "rule_based"
     AI_ASSISTED = "ai_assisted"
     LEARNED_PATTERN = "learned_pattern"
 
 
-class SubmissionStatus(str, Enum):
+class SubmissionStatus(StrEnum):
     """Form submission result status."""
     SUCCESS = "success"
     FAILED = "failed"
@@ -30,7 +38,7 @@ class SubmissionStatus(str, Enum):
     SKIPPED = "skipped"
 
 
-class QueueStatus(str, Enum):
+class QueueStatus(StrEnum):
     """Message queue processing status."""
     PENDING = "pending"
     PROCESSING = "processing"
@@ -38,7 +46,21 @@ class QueueStatus(str, Enum):
     FAILED = "failed"
 
 
-class FormSubmission(BaseModel):
+class _TrustedModel(BaseModel):
+    """Base for log records built from internal, already-validated data."""
+    
+    @classmethod
+    def fast_new(cls, **kwargs: Any) -> Self:
+        """
+        Build an instance without running validation.
+        
+        Only for trusted internal values - enum fields keep their
+        enum members (use_enum_values is not applied).
+        """
+        return cls.model_construct(**kwargs)
+
+
+class FormSubmission(_TrustedModel):
     """Log entry for a form submission attempt."""
     id: Optional[int] = None
     timestamp: datetime = Field(default_factory=datetime.now)
@@ -50,7 +72,7 @@ class FormSubmission(BaseModel):
     
     # Processing Details
     detection_method: DetectionMethod
-    confidence_score: Optional[float] = Field(None, ge=0.0, le=1.0)
+    confidence_score: Optional[float] = None  # 0.0-1.0, clamped by FormIntelligenceAgent
     
     # User Data Submitted
     student_name: str
@@ -64,7 +86,8 @@ class FormSubmission(BaseModel):
     screenshot_before: Optional[str] = None
     screenshot_filled: Optional[str] = None
     screenshot_after: Optional[str] = None
-    dom_snapshot: Optional[str] = None
+    dom_snapshot: Optional[str] = None  # Legacy file path, empty for new rows
+    dom_snapshot_blob: Optional[bytes] = Field(None, repr=False)  # Compressed HTML
     
     # Timing
     processing_time_seconds: Optional[float] = None
@@ -72,9 +95,12 @@ class FormSubmission(BaseModel):
     # Metadata
     whatsapp_message: Optional[str] = None
     user_agent: Optional[str] = None
-
-    class Config:
-        use_enum_values = True
+    
+    def dom_snapshot_inline(self) -> Optional[str]:
+        """Decompress the stored DOM snapshot on demand (None if not captured)."""
+        if self.dom_snapshot_blob is None:
+            return None
+        return decompress_dom(self.dom_snapshot_blob)
 
 
 class FieldPattern(BaseModel):
@@ -96,13 +122,27 @@ class FieldPattern(BaseModel):
     last_used_at: Optional[datetime] = None
     
     # Confidence
-    pattern_confidence: float = Field(0.0, ge=0.0, le=1.0)
-
-    class Config:
-        use_enum_values = True
+    pattern_confidence: float = 0.0  # 0.0-1.0
+    
+    def field_mappings_json(self) -> str:
+        """Encode field_mappings for the field_patterns TEXT column."""
+        return dump_json(self.field_mappings)
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> Self:
+        """
+        Build a pattern from a field_patterns row without re-validating it.
+        
+        Args:
+            row: Column name -> value mapping (field_mappings still JSON text)
+            
+        Returns:
+            FieldPattern instance
+        """
+        return cls.model_construct(**{**row, 'field_mappings': load_json(row['field_mappings'])})
 
 
-class ErrorLog(BaseModel):
+class ErrorLog(_TrustedModel):
     """Error tracking and debugging information."""
     id: Optional[int] = None
     timestamp: datetime = Field(default_factory=datetime.now)
@@ -139,7 +179,7 @@ class WhatsAppSession(BaseModel):
     qr_scan_required: bool = False
 
 
-class MessageQueueItem(BaseModel):
+class MessageQueueItem(_TrustedModel):
     """Queued message for processing."""
     id: Optional[int] = None
     created_at: datetime = Field(default_factory=datetime.now)
@@ -157,14 +197,11 @@ class MessageQueueItem(BaseModel):
     # Result
     submission_id: Optional[int] = None
 
-    class Config:
-        use_enum_values = True
-
 
 class SystemStats(BaseModel):
     """Daily system statistics."""
     id: Optional[int] = None
-    date: datetime = Field(default_factory=lambda: datetime.now().date())
+    date: Date = Field(default_factory=Date.today)
     
     # Daily Counts
     total_forms_processed: int = 0
@@ -182,6 +219,8 @@ class SystemStats(BaseModel):
 
 class UserData(BaseModel):
     """User information for form filling."""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+    
     student_name: str
     student_id: str
     
@@ -207,26 +246,24 @@ class FieldMapping(BaseModel):
     attendance_checkbox: Optional[str] = None
     submit_button: Optional[str] = None
     
-    confidence: float = Field(0.0, ge=0.0, le=1.0)
+    confidence: float = 0.0  # 0.0-1.0, clamped by FormIntelligenceAgent
+    
+    @property
+    def presence_mask(self) -> int:
+        """Bitmask of mapped fields (bit i set if _FIELD_NAMES[i] is mapped)."""
+        # Computed on access: plugins fill the mapping in after construction
+        return (
+            bool(self.name_field)
+            | bool(self.student_id_field) << 1
+            | bool(self.attendance_checkbox) << 2
+            | bool(self.submit_button) << 3
+        )
     
     def is_complete(self) -> bool:
         """Check if all required fields are mapped."""
-        return all([
-            self.name_field,
-            self.student_id_field,
-            self.attendance_checkbox,
-            self.submit_button
-        ])
+        return self.presence_mask == _ALL_FIELDS_MASK
     
     def get_missing_fields(self) -> list[str]:
         """Return list of missing field names."""
-        missing = []
-        if not self.name_field:
-            missing.append("name_field")
-        if not self.student_id_field:
-            missing.append("student_id_field")
-        if not self.attendance_checkbox:
-            missing.append("attendance_checkbox")
-        if not self.submit_button:
-            missing.append("submit_button")
-        return missing
+        mask = self.presence_mask
+        return [name for bit, name in enumerate(_FIELD_NAMES) if not mask >> bit & 1]
@@ -29,7 +29,8 @@ CREATE TABLE IF NOT EXISTS form_submissions (
     screenshot_before TEXT,
     screenshot_filled TEXT,
     screenshot_after TEXT,
-    dom_snapshot TEXT,
+    dom_snapshot TEXT, -- Legacy file path (empty for new rows)
+    dom_snapshot_blob BLOB, -- Compressed HTML (zstd, or gzip without zstandard)
     
     -- Timing
     processing_time_seconds REAL,
@@ -41,6 +42,7 @@ CREATE TABLE IF NOT EXISTS form_submissions (
 
 -- Index for faster queries
 CREATE INDEX IF NOT EXISTS idx_submissions_timestamp ON form_submissions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_submissions_date ON form_submissions(DATE(timestamp));
 CREATE INDEX IF NOT EXISTS idx_submissions_status ON form_submissions(status);
 CREATE INDEX IF NOT EXISTS idx_submissions_signature ON form_submissions(form_signature);
 
@@ -0,0 +1,25 @@
+"""
+JSON encoding for TEXT columns (orjson if installed, stdlib json otherwise).
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dump_json(value: Any) -> str:
+    """Serialize a value for a JSON TEXT column."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_json(text: str) -> Any:
+    """Parse a JSON TEXT column."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
@@ -11,17 +11,23 @@ from config import settings
 from orchestrator import FormFillingOrchestrator
 
 
+# Banner separator line
+_RULE = "=" * 70
+
+
 def setup_logging():
     """Configure loguru logging."""
     # Remove default handler
     logger.remove()
     
-    # Add console handler with colors
+    # Add console handler (colors only on a terminal); enqueue=True formats
+    # and writes on loguru's background thread instead of the caller's
     logger.add(
         sys.stderr,
         format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>",
         level=settings.log_level,
-        colorize=True,
+        colorize=sys.stderr.isatty(),
+        enqueue=True,
     )
     
     # Add file handler if enabled
@@ -34,6 +40,7 @@ def setup_logging():
             rotation="1 day",
             retention=f"{settings.log_retention_days} days",
             compression="zip",
+            enqueue=True,
         )
     
     logger.info("Logging configured")
@@ -43,14 +50,16 @@ def main():
     """Main entry point."""
     setup_logging()
     
-    logger.info("=" * 70)
-    logger.info("🤖 WhatsApp Form Auto-Fill System - MVP Phase 1")
-    logger.info("=" * 70)
-    logger.info(f"👤 Student: {settings.student_name}")
-    logger.info(f"🆔 ID: {settings.student_id}")
-    logger.info(f"📁 Database: {settings.database_path}")
-    logger.info(f"📂 Logs: {settings.logs_dir}")
-    logger.info("=" * 70)
+    logger.info(
+        f"{_RULE}\n"
+        f"🤖 WhatsApp Form Auto-Fill System - MVP Phase 1\n"
+        f"{_RULE}\n"
+        f"👤 Student: {settings.student_name}\n"
+        f"🆔 ID: {settings.student_id}\n"
+        f"📁 Database: {settings.database_path}\n"
+        f"📂 Logs: {settings.logs_dir}\n"
+        f"{_RULE}"
+    )
     
     # Check if OpenAI is configured
     if not settings.has_openai and settings.use_ai_fallback:
@@ -77,15 +86,19 @@ def main():
             logger.info(f"⏱️  Rate Limiter: {stats['rate_limiter']}\n")
         else:
             # Interactive mode (fallback)
-            logger.info("\n" + "=" * 70)
-            logger.info("🧪 INTERACTIVE MODE")
-            logger.info("=" * 70)
-            logger.info("\nUsage:")
-            logger.info("  python main.py <form_url>")
-            logger.info("\nOr paste URL below (type 'quit' to exit):\n")
+            logger.info(
+                f"\n{_RULE}\n"
+                f"🧪 INTERACTIVE MODE\n"
+                f"{_RULE}\n"
+                f"\nUsage:\n"
+                f"  python main.py <form_url>\n"
+                f"\nOr paste URL below (type 'quit' to exit):\n"
+            )
             
             while True:
                 try:
+                    # Flush queued log lines so they don't land after the prompt
+                    logger.complete()
                     form_url = input("Form URL: ").strip()
                     
                     if form_url.lower() in ['quit', 'exit', 'q']:
@@ -120,9 +133,7 @@ def main():
                 except Exception as e:
                     logger.exception(f"Unexpected error: {e}")
     
-    logger.info("\n" + "=" * 70)
-    logger.info("🛑 System shutdown complete")
-    logger.info("=" * 70)
+    logger.info(f"\n{_RULE}\n🛑 System shutdown complete\n{_RULE}")
 
 
 if __name__ == "__main__":
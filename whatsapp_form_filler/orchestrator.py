@@ -7,15 +7,26 @@ from typing import Optional
 from loguru import logger
 
 from config import settings, get_user_data
-from database.models import DetectionMethod
+from database.models import DetectionMethod, FormProvider
 from agents import (
     BrowserAutomationAgent,
     FormIntelligenceAgent,
     VerificationLoggerAgent,
 )
+from plugins import dispatch
 from utils import NotificationManager, RateLimiter
 
 
+# Any of these means the form page has rendered enough to analyze
+FORM_READY_SELECTOR = 'form, [role="form"], input'
+
+# Per-form banner, built once; loguru fills in the URL
+_FORM_BANNER = "\n" + "=" * 60 + "\n🎯 Processing form: {}\n" + "=" * 60 + "\n"
+
+# Longest we wait for a human to solve a CAPTCHA (seconds)
+CAPTCHA_SOLVE_TIMEOUT = 120
+
+
 class FormFillingOrchestrator:
     """
     Coordinates the entire form filling workflow.
@@ -47,6 +58,8 @@ class FormFillingOrchestrator:
         
         # Get user data
         self.user_data = get_user_data()
+        self._student_name = self.user_data.student_name
+        self._student_id = self.user_data.student_id
         
         logger.success("✅ Orchestrator initialized")
     
@@ -60,14 +73,19 @@ class FormFillingOrchestrator:
         Returns:
             True if successful, False otherwise
         """
-        start_time = time.time()
-        logger.info(f"\n{'='*60}")
-        logger.info(f"🎯 Processing form: {form_url}")
-        logger.info(f"{'='*60}\n")
+        # Locals for names used on every step of this hot path
+        log = logger
+        monotonic = time.monotonic
         
-        # Check rate limiting
-        logger.info("⏳ Checking rate limits...")
-        self.rate_limiter.wait_if_needed()
+        start_time = monotonic()
+        # One wall-clock read per form, reused for the submission record
+        started_at = datetime.now()
+        log.info(_FORM_BANNER, form_url)
+        
+        # Check rate limiting (skipped when the next slot is already open)
+        if self.rate_limiter.needs_wait():
+            log.info("⏳ Checking rate limits...")
+            self.rate_limiter.wait_if_needed()
         
         screenshots = {}
         plugin = None
@@ -75,29 +93,31 @@ class FormFillingOrchestrator:
         
         try:
             # Step 1: Navigate to form
-            logger.info("Step 1/6: Opening form...")
-            if not self.browser_agent.navigate_to(form_url):
+            log.info("Step 1/6: Opening form...")
+            if not self.browser_agent.navigate_to(
+                form_url,
+                ready_selector=FORM_READY_SELECTOR
+            ):
                 raise Exception("Failed to navigate to form")
             
             # Check for CAPTCHA immediately
             if self.browser_agent.check_captcha():
-                logger.critical("🔴 CAPTCHA detected immediately!")
+                log.critical("🔴 CAPTCHA detected immediately!")
                 self.notification_manager.notify_captcha(form_url)
                 
-                # Give user time to solve
-                logger.info("⏸️  Pausing for 2 minutes to allow manual CAPTCHA solving...")
-                time.sleep(120)
-                
-                # Check again
-                if self.browser_agent.check_captcha():
+                # Give user time to solve - continue as soon as it clears
+                log.info("⏸️  Waiting up to 2 minutes for manual CAPTCHA solving...")
+                captcha_cleared = self.browser_agent.wait_for_captcha_cleared(CAPTCHA_SOLVE_TIMEOUT)
+                if not captcha_cleared:
                     raise Exception("CAPTCHA not solved - skipping form")
+                log.success("✅ CAPTCHA cleared")
             
             # Take initial screenshot
             if settings.screenshot_on_success or settings.screenshot_on_error:
                 screenshots['before'] = self.browser_agent.take_screenshot("01_initial")
             
             # Step 2: Analyze form
-            logger.info("Step 2/6: Analyzing form structure...")
+            log.info("Step 2/6: Analyzing form structure...")
             plugin, field_mapping = self.intelligence_agent.analyze_form(
                 self.browser_agent.page,
                 form_url
@@ -107,16 +127,16 @@ class FormFillingOrchestrator:
                 raise Exception("Form analysis failed")
             
             if not field_mapping.is_complete():
-                logger.warning(
+                log.warning(
                     f"⚠️  Incomplete field mapping - confidence: {field_mapping.confidence}"
                 )
                 if field_mapping.confidence < settings.ai_confidence_threshold:
                     # In Phase 2, we would call AI fallback here
-                    logger.error("Confidence too low and AI fallback not yet implemented")
+                    log.error("Confidence too low and AI fallback not yet implemented")
                     raise Exception("Incomplete field mapping")
             
             # Step 3: Fill form
-            logger.info("Step 3/6: Filling form fields...")
+            log.info("Step 3/6: Filling form fields...")
             success = plugin.fill_form(
                 self.browser_agent.page,
                 field_mapping,
@@ -131,7 +151,7 @@ class FormFillingOrchestrator:
                 screenshots['filled'] = self.browser_agent.take_screenshot("02_filled")
             
             # Step 4: Submit form
-            logger.info("Step 4/6: Submitting form...")
+            log.info("Step 4/6: Submitting form...")
             success = plugin.submit_form(
                 self.browser_agent.page,
                 field_mapping
@@ -141,67 +161,71 @@ class FormFillingOrchestrator:
                 raise Exception("Form submission failed")
             
             # Step 5: Verify submission
-            logger.info("Step 5/6: Verifying submission...")
+            log.info("Step 5/6: Verifying submission...")
             verified = plugin.verify_submission(self.browser_agent.page)
             
             # Screenshot after submission
             screenshots['after'] = self.browser_agent.take_screenshot("03_submitted")
             
             # Step 6: Log results
-            logger.info("Step 6/6: Logging results...")
-            processing_time = time.time() - start_time
+            log.info("Step 6/6: Logging results...")
+            processing_time = monotonic() - start_time
             
             self.verification_agent.verify_and_log(
                 page=self.browser_agent.page,
                 form_url=form_url,
                 provider=plugin.provider_name,
                 detection_method=DetectionMethod.RULE_BASED,
-                student_name=self.user_data.student_name,
-                student_id=self.user_data.student_id,
+                student_name=self._student_name,
+                student_id=self._student_id,
                 confidence=field_mapping.confidence,
                 screenshots=screenshots,
                 processing_time=processing_time,
                 is_successful=verified,
+                timestamp=started_at,
+                wait=False,
             )
             
             # Record submission for rate limiting
             self.rate_limiter.record_submission()
             
             if verified:
-                logger.success(f"\n🎉 SUCCESS! Form completed in {processing_time:.1f}s\n")
+                log.success("\n🎉 SUCCESS! Form completed in {:.1f}s\n", processing_time)
                 return True
             else:
-                logger.warning(f"\n⚠️  Form submitted but verification uncertain\n")
+                log.warning("\n⚠️  Form submitted but verification uncertain\n")
                 return True  # Still count as success
         
         except Exception as e:
-            logger.error(f"\n❌ FAILED: {str(e)}\n")
+            log.error("\n❌ FAILED: {}\n", e)
+            
+            # Slow down after failures (possible blocking)
+            self.rate_limiter.record_failure()
             
             # Log error
-            processing_time = time.time() - start_time
+            processing_time = monotonic() - start_time
             
             if settings.screenshot_on_error:
                 screenshots['error'] = self.browser_agent.take_screenshot("99_error")
             
             # Log to database even if failed
-            try:
-                provider = plugin.provider_name if plugin else self.intelligence_agent.identify_provider(form_url).provider_name
-            except:
-                from database.models import FormProvider
-                provider = FormProvider.UNKNOWN
+            log_plugin = plugin or dispatch(form_url)
+            provider = log_plugin.provider_name if log_plugin else FormProvider.UNKNOWN
             
             self.verification_agent.verify_and_log(
                 page=self.browser_agent.page if self.browser_agent.page else None,
                 form_url=form_url,
                 provider=provider,
                 detection_method=DetectionMethod.RULE_BASED,
-                student_name=self.user_data.student_name,
-                student_id=self.user_data.student_id,
+                student_name=self._student_name,
+                student_id=self._student_id,
                 confidence=field_mapping.confidence if field_mapping else 0.0,
                 screenshots=screenshots,
                 processing_time=processing_time,
                 is_successful=False,
                 error_message=str(e),
+                timestamp=started_at,
+                wait=False,
             )
             
             return False
@@ -231,6 +255,9 @@ class FormFillingOrchestrator:
         # Print final stats
         stats = self.get_stats()
         logger.info(f"\n📊 Daily Stats: {stats['daily']}\n")
+        
+        self.verification_agent.close()
+        self.notification_manager.close()
     
     def __enter__(self):
         """Context manager entry."""
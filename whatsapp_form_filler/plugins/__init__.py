@@ -1,15 +1,91 @@
-"""Plugins module initialization."""
+"""Plugins module initialization.
+
+Plugin modules are imported on first access and each plugin is only
+instantiated once a URL dispatches to it.
+"""
+import importlib
+import re
+from typing import Optional
+
 from .base import FormProviderPlugin
-from .microsoft_forms import MicrosoftFormsPlugin
-from .google_forms import GoogleFormsPlugin
-from .moodle import MoodlePlugin
-
-# Registry of all available plugins
-ALL_PLUGINS = [
-    MicrosoftFormsPlugin(),
-    GoogleFormsPlugin(),
-    MoodlePlugin(),
-]
+
+# Plugin class name -> module, in dispatch priority order
+_PLUGIN_MODULES = {
+    "MicrosoftFormsPlugin": ".microsoft_forms",
+    "GoogleFormsPlugin": ".google_forms",
+    "MoodlePlugin": ".moodle",
+}
+
+# Instances created so far, keyed by class name
+_instances: dict[str, FormProviderPlugin] = {}
+_dispatch_re: Optional[re.Pattern] = None
+
+
+def _plugin_class(name: str) -> type[FormProviderPlugin]:
+    """Import a plugin module and return its class."""
+    return getattr(importlib.import_module(_PLUGIN_MODULES[name], __name__), name)
+
+
+def _get_plugin(name: str) -> FormProviderPlugin:
+    """Return the cached instance of a plugin, creating it on first use."""
+    plugin = _instances.get(name)
+    if plugin is None:
+        plugin = _instances[name] = _plugin_class(name)()
+    return plugin
+
+
+def get_plugins() -> list[FormProviderPlugin]:
+    """
+    Instantiate (if needed) and return every registered plugin.
+    
+    Returns:
+        Plugin instances in dispatch priority order
+    """
+    return [_get_plugin(name) for name in _PLUGIN_MODULES]
+
+
+def _build_dispatch_re() -> re.Pattern:
+    # One regex for all plugins: each alternative is a lookahead for that
+    # plugin's url_pattern followed by an empty group named after the class.
+    # Alternatives are tried in registry order at position 0, so the first
+    # matching plugin wins. Only class attributes are read - nothing is
+    # instantiated here.
+    return re.compile(
+        '|'.join(
+            f'(?=.*?(?:{_plugin_class(name).url_pattern}))(?P<{name}>)'
+            for name in _PLUGIN_MODULES
+        ),
+        re.IGNORECASE | re.DOTALL,
+    )
+
+
+def dispatch(url: str) -> Optional[FormProviderPlugin]:
+    """
+    Find the plugin for a URL with a single regex match.
+    
+    Args:
+        url: Form URL
+        
+    Returns:
+        Plugin instance if found, None otherwise
+    """
+    global _dispatch_re
+    if _dispatch_re is None:
+        _dispatch_re = _build_dispatch_re()
+    m = _dispatch_re.match(url)
+    return _get_plugin(m.lastgroup) if m else None
+
+
+def __getattr__(name: str):
+    if name in _PLUGIN_MODULES:
+        value = _plugin_class(name)
+    elif name == "ALL_PLUGINS":
+        value = get_plugins()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "FormProviderPlugin",
@@ -17,4 +93,6 @@ __all__ = [
     "GoogleFormsPlugin",
     "MoodlePlugin",
     "ALL_PLUGINS",
+    "get_plugins",
+    "dispatch",
 ]
@@ -1,20 +1,25 @@
 """
 Plugin base class for form providers.
 """
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from typing import Optional
-from playwright.sync_api import Page
+from typing import ClassVar, Optional, TYPE_CHECKING
 from database.models import UserData, FieldMapping, FormProvider
 
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
 
 class FormProviderPlugin(ABC):
     """Abstract base class for form provider plugins."""
     
-    @property
-    @abstractmethod
-    def provider_name(self) -> FormProvider:
-        """Return the provider enum value."""
-        pass
+    # Case-insensitive regex searched in the URL; all plugins' patterns
+    # are combined into one dispatch regex in plugins/__init__.py
+    url_pattern: str = ''
+    
+    # Provider enum value; subclasses set it as a plain class attribute
+    provider_name: ClassVar[FormProvider]
     
     @abstractmethod
     def can_handle(self, url: str) -> bool:
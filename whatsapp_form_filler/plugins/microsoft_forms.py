@@ -1,26 +1,153 @@
 """
 Microsoft Forms plugin - optimized for Turkish educational forms.
 """
+from __future__ import annotations
+
 import re
-from typing import Optional
-from playwright.sync_api import Page, Locator
+import time
+from typing import Optional, TYPE_CHECKING
+from urllib.parse import parse_qs, urlsplit
 from loguru import logger
 
 from database.models import UserData, FieldMapping, FormProvider
 from plugins.base import FormProviderPlugin
 from utils import HumanBehavior, ReadingPatterns
 
+if TYPE_CHECKING:
+    from playwright.sync_api import Page, Locator
+
+
+# Question-title patterns, matched against titles lowercased with Turkish
+# rules: an uppercase ASCII I (English words, or Turkish typed without İ
+# as in "ISIM", "ÖĞRENCI") becomes dotless ı, hence [iı] wherever i occurs.
+# Each list is joined into one alternation so a category costs one search
+_NAME_RE = re.compile('|'.join([
+    r'(ad|[iı]s[iı]m|name).*soyad',
+    r'ad\s*(ve|-)?\s*soyad',
+    r'tam\s*ad',
+    r'öğrenc[iı]\s*ad',
+    r'student\s*name',
+    r'full\s*name',
+]))
+_STUDENT_ID_RE = re.compile('|'.join([
+    r'öğrenc[iı]\s*no',
+    r'öğrenc[iı]\s*numara',
+    r'student\s*[iı]d',
+    r'student\s*number',
+    r'numara',
+    r'\bno\b',  # Just "no" with word boundaries
+]))
+_ATTENDANCE_RE = re.compile('|'.join([
+    r'katılım',
+    r'onay',
+    r'attendance',
+    r'ders.*onay',
+    r'e-onay',
+    r'conf[iı]rm',
+]))
+
+# All three categories in one regex: each alternative is a lookahead for
+# that category's patterns followed by an empty named group. Alternatives
+# are tried in order at position 0, so name beats student_id beats
+# attendance, exactly like the old if/elif chain - in a single match call.
+_FIELD_RE = re.compile('|'.join(
+    f'(?=(?s:.*?)(?:{pattern.pattern}))(?P<{field}>)'
+    for field, pattern in (
+        ('name', _NAME_RE),
+        ('student_id', _STUDENT_ID_RE),
+        ('attendance', _ATTENDANCE_RE),
+    )
+))
+
+# Success indicators in Turkish and English (shown after submitting)
+_SUCCESS_TEXT_RE = re.compile('|'.join(map(re.escape, [
+    "yanıtınız kaydedildi",
+    "teşekkürler",
+    "gönderildi",
+    "your response has been recorded",
+    "thank you",
+    "response recorded",
+    "başarıyla gönderildi",
+])), re.IGNORECASE)
+_THANK_YOU_SELECTOR = '[data-automation-id="thankYouMessage"]'
+
+_QUESTION_SELECTOR = '[data-automation-id="questionItem"]'
+
+# Runs in the page and collects everything analyze_form needs in one
+# round-trip: per question, the title text lowercased with Turkish rules
+# (KATILIM -> katılım, İSİM -> isim) and stable selectors for its inputs,
+# plus the submit button (falling back to a button whose text says
+# "gönder"/"submit"). Selector precedence: data-automation-id, id, name.
+_ANALYZE_JS = """
+questionSelector => {
+    const stable = el => {
+        if (!el) return null;
+        const automationId = el.getAttribute('data-automation-id');
+        if (automationId) return `[data-automation-id="${automationId}"]`;
+        if (el.id) return `#${el.id}`;
+        const name = el.getAttribute('name');
+        if (name) return `[name="${name}"]`;
+        return 'body';
+    };
+    const questions = [...document.querySelectorAll(questionSelector)].map(q => {
+        const title = q.querySelector('[data-automation-id="questionTitle"]');
+        return {
+            title: title ? title.innerText.trim().toLocaleLowerCase('tr') : null,
+            textInput: stable(q.querySelector('input[type="text"]')),
+            checkbox: stable(q.querySelector('input[type="checkbox"]')),
+            choice: stable(q.querySelector('[data-automation-id="choiceItem"]')),
+        };
+    });
+    let submit = document.querySelector('button[data-automation-id="submitButton"]');
+    if (!submit) {
+        submit = [...document.querySelectorAll('button')].find(btn => {
+            const text = btn.innerText.toLowerCase();
+            return text.includes('gönder') || text.includes('submit');
+        });
+    }
+    return {questions, submitButton: stable(submit)};
+}
+"""
+
+
+def _success_locator(page: Page) -> Locator:
+    """
+    One locator for the thank-you element or any success text.
+    
+    The text regex is evaluated in the browser against the live DOM.
+    """
+    return (
+        page.locator(_THANK_YOU_SELECTOR)
+        .or_(page.get_by_text(_SUCCESS_TEXT_RE))
+        .first
+    )
+
+
+# How long a complete field mapping is reused for the same form
+MAPPING_CACHE_TTL = 24 * 3600
+
+
+def _form_key(url: str) -> str:
+    """Cache key for a form URL: host + path + the form's id parameter."""
+    parts = urlsplit(url)
+    form_id = parse_qs(parts.query).get('id')
+    key = f"{parts.netloc}{parts.path}"
+    return f"{key}?id={form_id[0]}" if form_id else key
+
 
 class MicrosoftFormsPlugin(FormProviderPlugin):
     """Microsoft Forms (forms.office.com) handler."""
     
-    @property
-    def provider_name(self) -> FormProvider:
-        return FormProvider.MICROSOFT_FORMS
+    provider_name = FormProvider.MICROSOFT_FORMS
+    url_pattern = r'forms\.office\.com|forms\.microsoft\.com'
+    _URL_RE = re.compile(url_pattern, re.IGNORECASE)
+    
+    # Form key -> (complete mapping, time.monotonic() when analyzed)
+    _mapping_cache: dict[str, tuple[FieldMapping, float]] = {}
     
     def can_handle(self, url: str) -> bool:
         """Check if URL is Microsoft Forms."""
-        return 'forms.office.com' in url.lower() or 'forms.microsoft.com' in url.lower()
+        return self._URL_RE.search(url) is not None
     
     def analyze_form(self, page: Page) -> Optional[FieldMapping]:
         """
@@ -36,7 +163,7 @@ class MicrosoftFormsPlugin(FormProviderPlugin):
         
         # Wait for form to load (increased timeout for login redirects)
         try:
-            page.wait_for_selector('[data-automation-id="questionItem"]', timeout=30000)
+            page.wait_for_selector(_QUESTION_SELECTOR, timeout=30000)
         except Exception as e:
             logger.error(f"Form did not load properly: {e}")
             return None
@@ -44,149 +171,83 @@ class MicrosoftFormsPlugin(FormProviderPlugin):
         # Scan the form like a human would
         ReadingPatterns.scan_form(page)
         
+        # Same form analyzed recently - reuse its mapping
+        form_key = _form_key(page.url)
+        cached = self._mapping_cache.get(form_key)
+        if cached and time.monotonic() - cached[1] < MAPPING_CACHE_TTL:
+            logger.info("♻️  Using cached field mapping for this form")
+            return cached[0].model_copy()
+        
         mapping = FieldMapping()
         
-        # Find all question items
-        questions = page.query_selector_all('[data-automation-id="questionItem"]')
+        # Question titles, input selectors and the submit button in one call
+        form = page.evaluate(_ANALYZE_JS, _QUESTION_SELECTOR)
+        questions = form['questions']
         logger.info(f"Found {len(questions)} questions")
         
         for idx, question in enumerate(questions):
-            try:
-                # Get question text
-                title_element = question.query_selector('[data-automation-id="questionTitle"]')
-                if not title_element:
-                    continue
-                
-                question_text = (title_element.inner_text()).lower().strip()
-                logger.debug(f"Question {idx + 1}: {question_text}")
-                
-                # PATTERN MATCHING for Turkish forms
-                
-                # 1. NAME FIELD
-                if self._is_name_field(question_text):
-                    input_field = question.query_selector('input[type="text"]')
-                    if input_field:
-                        selector = self._get_stable_selector(input_field)
-                        mapping.name_field = selector
-                        logger.info(f"✅ Found name field: {question_text}")
-                
-                # 2. STUDENT ID FIELD
-                elif self._is_student_id_field(question_text):
-                    input_field = question.query_selector('input[type="text"]')
-                    if input_field:
-                        selector = self._get_stable_selector(input_field)
-                        mapping.student_id_field = selector
-                        logger.info(f"✅ Found student ID field: {question_text}")
-                
-                # 3. ATTENDANCE CHECKBOX
-                elif self._is_attendance_checkbox(question_text):
-                    # Look for checkbox
-                    checkbox = question.query_selector('input[type="checkbox"]')
-                    if checkbox:
-                        selector = self._get_stable_selector(checkbox)
-                        mapping.attendance_checkbox = selector
-                        logger.info(f"✅ Found attendance checkbox: {question_text}")
-                    else:
-                        # Maybe it's a radio button or choice
-                        choice = question.query_selector('[data-automation-id="choiceItem"]')
-                        if choice:
-                            selector = self._get_stable_selector(choice)
-                            mapping.attendance_checkbox = selector
-                            logger.info(f"✅ Found attendance choice: {question_text}")
-            
-            except Exception as e:
-                logger.warning(f"Error analyzing question {idx + 1}: {e}")
+            # Get question text
+            if question['title'] is None:
                 continue
+            
+            question_text = question['title']
+            logger.debug(f"Question {idx + 1}: {question_text}")
+            
+            # PATTERN MATCHING for Turkish forms (one scan, first category wins)
+            field = self._classify_question(question_text)
+            
+            # 1. NAME FIELD
+            if field == 'name':
+                if question['textInput']:
+                    mapping.name_field = question['textInput']
+                    logger.info(f"✅ Found name field: {question_text}")
+            
+            # 2. STUDENT ID FIELD
+            elif field == 'student_id':
+                if question['textInput']:
+                    mapping.student_id_field = question['textInput']
+                    logger.info(f"✅ Found student ID field: {question_text}")
+            
+            # 3. ATTENDANCE CHECKBOX
+            elif field == 'attendance':
+                # Look for checkbox
+                if question['checkbox']:
+                    mapping.attendance_checkbox = question['checkbox']
+                    logger.info(f"✅ Found attendance checkbox: {question_text}")
+                # Maybe it's a radio button or choice
+                elif question['choice']:
+                    mapping.attendance_checkbox = question['choice']
+                    logger.info(f"✅ Found attendance choice: {question_text}")
         
-        # Find submit button
-        submit_btn = page.query_selector('button[data-automation-id="submitButton"]')
-        if not submit_btn:
-            # Fallback: look for "Gönder" text
-            buttons = page.query_selector_all('button')
-            for btn in buttons:
-                btn_text = (btn.inner_text()).lower()
-                if 'gönder' in btn_text or 'submit' in btn_text:
-                    submit_btn = btn
-                    break
-        
-        if submit_btn:
-            mapping.submit_button = self._get_stable_selector(submit_btn)
+        # Submit button
+        if form['submitButton']:
+            mapping.submit_button = form['submitButton']
             logger.info("✅ Found submit button")
         
-        # Calculate confidence
-        if mapping.is_complete():
-            mapping.confidence = 1.0
+        # Calculate confidence (one pass over the mapped fields)
+        missing = mapping.get_missing_fields()
+        mapping.confidence = (4 - len(missing)) / 4.0
+        if not missing:
             logger.success(f"🎯 Form analysis complete - confidence: {mapping.confidence}")
+            # Only complete mappings are reused; partial ones are re-analyzed
+            self._mapping_cache[form_key] = (mapping.model_copy(), time.monotonic())
         else:
-            missing = mapping.get_missing_fields()
-            mapping.confidence = (4 - len(missing)) / 4.0
             logger.warning(f"⚠️  Missing fields: {missing} - confidence: {mapping.confidence}")
         
         return mapping
     
-    def _is_name_field(self, text: str) -> bool:
-        """Check if text indicates name field."""
-        patterns = [
-            r'(ad|isim|name).*soyad',
-            r'ad\s*(ve|-)?\s*soyad',
-            r'tam\s*ad',
-            r'öğrenci\s*ad',
-            r'student\s*name',
-            r'full\s*name',
-        ]
-        return any(re.search(pattern, text) for pattern in patterns)
-    
-    def _is_student_id_field(self, text: str) -> bool:
-        """Check if text indicates student ID field."""
-        patterns = [
-            r'öğrenci\s*no',
-            r'öğrenci\s*numara',
-            r'student\s*id',
-            r'student\s*number',
-            r'numara',
-            r'\bno\b',  # Just "no" with word boundaries
-        ]
-        return any(re.search(pattern, text) for pattern in patterns)
-    
-    def _is_attendance_checkbox(self, text: str) -> bool:
-        """Check if text indicates attendance checkbox."""
-        patterns = [
-            r'katılım',
-            r'onay',
-            r'attendance',
-            r'ders.*onay',
-            r'e-onay',
-            r'confirm',
-        ]
-        return any(re.search(pattern, text) for pattern in patterns)
-    
-    def _get_stable_selector(self, element: Locator) -> str:
+    def _classify_question(self, text: str) -> Optional[str]:
         """
-        Get a stable selector for an element.
+        Classify a lowercased question title.
         
         Args:
-            element: Playwright locator
+            text: Question title
             
         Returns:
-            CSS selector string
+            'name', 'student_id' or 'attendance', or None if nothing matches
         """
-        # Try to get data-automation-id first (most stable)
-        automation_id = element.get_attribute('data-automation-id')
-        if automation_id:
-            return f'[data-automation-id="{automation_id}"]'
-        
-        # Fallback to ID
-        elem_id = element.get_attribute('id')
-        if elem_id:
-            return f'#{elem_id}'
-        
-        # Last resort: name attribute
-        name = element.get_attribute('name')
-        if name:
-            return f'[name="{name}"]'
-        
-        # Very last resort: create xpath
-        return 'body'  # Simplified fallback
+        m = _FIELD_RE.match(text)
+        return m.lastgroup if m else None
     
     def fill_form(
         self,
@@ -259,12 +320,13 @@ class MicrosoftFormsPlugin(FormProviderPlugin):
             # Human-like click
             HumanBehavior.human_click(submit_btn, page)
             
-            # Wait for navigation or confirmation
+            # Wait for the confirmation to render; networkidle rarely settles
+            # on Microsoft Forms because telemetry beacons keep firing
             try:
-                page.wait_for_load_state('networkidle', timeout=10000)
-            except:
-                # Sometimes forms don't trigger full reload
-                page.wait_for_timeout(3000)
+                _success_locator(page).wait_for(state='visible', timeout=8000)
+            except Exception:
+                # No confirmation yet - give it a moment, verify_submission decides
+                page.wait_for_timeout(1500)
             
             logger.success("✅ Form submitted")
             return True
@@ -285,37 +347,12 @@ class MicrosoftFormsPlugin(FormProviderPlugin):
         """
         logger.info("🔍 Verifying submission...")
         
-        # Success indicators in Turkish and English
-        success_indicators = [
-            "yanıtınız kaydedildi",
-            "teşekkürler",
-            "gönderildi",
-            "your response has been recorded",
-            "thank you",
-            "response recorded",
-            "başarıyla gönderildi",
-        ]
-        
         try:
-            # Get page text
-            page_text = (page.inner_text('body')).lower()
-            
-            # Check for success indicators
-            for indicator in success_indicators:
-                if indicator in page_text:
-                    logger.success(f"✅ Submission verified: Found '{indicator}'")
-                    return True
-            
-            # Check for success message element
-            success_elem = page.query_selector('[data-automation-id="thankYouMessage"]')
-            if success_elem:
-                logger.success("✅ Submission verified: Found thank you message element")
-                return True
-            
+            _success_locator(page).wait_for(state='visible', timeout=10000)
+        except Exception as e:
             logger.warning("⚠️  Could not verify submission - no success indicators found")
-            logger.debug(f"Page text preview: {page_text[:200]}")
+            logger.debug(f"Success indicator wait ended: {e}")
             return False
         
-        except Exception as e:
-            logger.error(f"Error verifying submission: {e}")
-            return False
+        logger.success("✅ Submission verified: Found success message")
+        return True
@@ -1,31 +1,36 @@
 """
 Moodle plugin (Phase 3 - placeholder).
 """
-from typing import Optional
-from playwright.sync_api import Page
+from __future__ import annotations
+
+import re
+from typing import Optional, TYPE_CHECKING
 from loguru import logger
 
 from database.models import UserData, FieldMapping, FormProvider
 from plugins.base import FormProviderPlugin
 
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
 
 class MoodlePlugin(FormProviderPlugin):
     """Moodle attendance handler (coming in Phase 3)."""
     
-    @property
-    def provider_name(self) -> FormProvider:
-        return FormProvider.MOODLE
+    provider_name = FormProvider.MOODLE
+    url_pattern = r'moodle.*attendance|attendance.*moodle'
+    _URL_RE = re.compile(url_pattern, re.IGNORECASE)
     
     def can_handle(self, url: str) -> bool:
         """Check if URL is Moodle."""
-        return 'moodle' in url.lower() and 'attendance' in url.lower()
+        return self._URL_RE.search(url) is not None
     
-    async def analyze_form(self, page: Page) -> Optional[FieldMapping]:
+    def analyze_form(self, page: Page) -> Optional[FieldMapping]:
         """Not yet implemented."""
         logger.warning("Moodle plugin not yet implemented (Phase 3)")
         return None
     
-    async def fill_form(
+    def fill_form(
         self,
         page: Page,
         field_mapping: FieldMapping,
@@ -34,7 +39,7 @@ class MoodlePlugin(FormProviderPlugin):
         """Not yet implemented."""
         return False
     
-    async def submit_form(
+    def submit_form(
         self,
         page: Page,
         field_mapping: FieldMapping
@@ -42,6 +47,6 @@ class MoodlePlugin(FormProviderPlugin):
         """Not yet implemented."""
         return False
     
-    async def verify_submission(self, page: Page) -> bool:
+    def verify_submission(self, page: Page) -> bool:
         """Not yet implemented."""
         return False
@@ -7,6 +7,9 @@ from loguru import logger
 import time
 import os
 
+from database.models import UserData
+from plugins import MicrosoftFormsPlugin
+
 # ============================================================
 # CONFIGURATION - Edit these
 # ============================================================
@@ -15,6 +18,8 @@ STUDENT_NAME = "Halil Eren Kepiç"
 STUDENT_ID = "2306002093"
 # ============================================================
 
+QUESTION_SELECTOR = '[data-automation-id="questionItem"]'
+
 def fill_form():
     """Fill the Microsoft Form using Chrome profile."""
     
@@ -55,110 +60,47 @@ def fill_form():
             logger.info(f"📋 Opening form: {FORM_URL}")
             page.goto(FORM_URL, wait_until='networkidle', timeout=60000)
             
-            # Wait a bit for any redirects (like Microsoft login)
-            logger.info("⏳ Waiting for form to load (30 seconds)...")
-            time.sleep(5)
-            
-            # Try to wait for form questions
+            # Wait for form questions (returns as soon as they render,
+            # including after redirects like Microsoft login)
+            logger.info("⏳ Waiting for form to load (up to 30 seconds)...")
             try:
-                page.wait_for_selector('[data-automation-id="questionItem"]', timeout=25000)
+                page.wait_for_selector(QUESTION_SELECTOR, timeout=30000)
                 logger.success("✅ Form loaded!")
             except:
                 logger.warning("⚠️  Form may need login - waiting longer...")
                 logger.info("👉 If you see login screen, please login manually now!")
-                logger.info("⏰ Waiting 60 seconds for you to login...")
-                time.sleep(60)
+                logger.info("⏰ Waiting up to 2 minutes for you to login...")
+                page.wait_for_selector(QUESTION_SELECTOR, timeout=120_000)
+                logger.success("✅ Form loaded!")
             
             # Take screenshot before filling
             page.screenshot(path='before_fill.png')
             logger.info("📸 Screenshot: before_fill.png")
             
-            # Find all input fields
-            logger.info("🔍 Looking for form fields...")
+            # Analyze, fill, submit and verify with the real plugin
+            plugin = MicrosoftFormsPlugin()
+            mapping = plugin.analyze_form(page)
+            if not mapping:
+                raise Exception("Form analysis failed")
             
-            # Get all questions
-            questions = page.query_selector_all('[data-automation-id="questionItem"]')
-            logger.info(f"Found {len(questions)} questions")
-            
-            for idx, question in enumerate(questions):
-                try:
-                    # Get question text
-                    title_elem = question.query_selector('[data-automation-id="questionTitle"]')
-                    if not title_elem:
-                        continue
-                    
-                    question_text = title_elem.inner_text().lower()
-                    logger.info(f"Question {idx+1}: {question_text}")
-                    
-                    # Check what type of field
-                    if 'ad' in question_text or 'soyad' in question_text or 'isim' in question_text:
-                        # Name field
-                        input_field = question.query_selector('input[type="text"]')
-                        if input_field:
-                            logger.info(f"✍️  Filling name: {STUDENT_NAME}")
-                            input_field.click()
-                            time.sleep(0.5)
-                            input_field.fill(STUDENT_NAME)
-                            time.sleep(1)
-                    
-                    elif 'no' in question_text or 'numara' in question_text:
-                        # Student ID field
-                        input_field = question.query_selector('input[type="text"]')
-                        if input_field:
-                            logger.info(f"✍️  Filling student ID: {STUDENT_ID}")
-                            input_field.click()
-                            time.sleep(0.5)
-                            input_field.fill(STUDENT_ID)
-                            time.sleep(1)
-                    
-                    elif 'katılım' in question_text or 'onay' in question_text or 'ders' in question_text:
-                        # Attendance checkbox
-                        checkbox = question.query_selector('input[type="checkbox"]')
-                        if checkbox:
-                            logger.info("✅ Checking attendance box")
-                            checkbox.check()
-                            time.sleep(1)
-                
-                except Exception as e:
-                    logger.warning(f"Could not process question {idx+1}: {e}")
+            user_data = UserData(student_name=STUDENT_NAME, student_id=STUDENT_ID)
+            plugin.fill_form(page, mapping, user_data)
             
             # Take screenshot after filling
             page.screenshot(path='after_fill.png')
             logger.info("📸 Screenshot: after_fill.png")
             
-            # Find and click submit button
-            logger.info("🔍 Looking for submit button...")
-            
-            # Try standard submit button
-            submit_btn = page.query_selector('button[data-automation-id="submitButton"]')
-            
-            if not submit_btn:
-                # Try to find by text
-                buttons = page.query_selector_all('button')
-                for btn in buttons:
-                    btn_text = btn.inner_text().lower()
-                    if 'gönder' in btn_text or 'submit' in btn_text:
-                        submit_btn = btn
-                        break
-            
-            if submit_btn:
-                logger.info("📤 Clicking submit button...")
-                submit_btn.click()
-                time.sleep(5)
+            if plugin.submit_form(page, mapping):
+                verified = plugin.verify_submission(page)
                 
                 # Take screenshot after submission
                 page.screenshot(path='after_submit.png')
                 logger.info("📸 Screenshot: after_submit.png")
                 
-                # Check for success message
-                page_text = page.inner_text('body').lower()
-                
-                if 'kaydedildi' in page_text or 'teşekkür' in page_text or 'recorded' in page_text:
+                if verified:
                     logger.success("🎉 SUCCESS! Form submitted!")
                 else:
                     logger.warning("⚠️  Form submitted but no confirmation message found")
-            else:
-                logger.error("❌ Could not find submit button")
             
             # Wait a bit so you can see the result
             logger.info("⏳ Waiting 5 seconds before closing...")
@@ -2,6 +2,7 @@
 Test script to verify all components are working.
 Run this before using main.py to ensure everything is set up correctly.
 """
+import functools
 import sys
 
 def test_imports():
@@ -104,18 +105,78 @@ def test_database():
         return False
 
 
+def _turkish_lower(text):
+    """Lowercase like JS toLocaleLowerCase('tr') (I -> ı, İ -> i)."""
+    return text.replace('I', 'ı').replace('İ', 'i').lower()
+
+
+def test_field_patterns():
+    """Test question titles are classified after Turkish lowercasing."""
+    print("\n🧪 Testing question-title patterns...")
+    
+    try:
+        from plugins.microsoft_forms import _FIELD_RE
+        
+        cases = [
+            ("ISIM SOYAD", 'name'),
+            ("İSİM SOYAD", 'name'),
+            ("Ad Soyad", 'name'),
+            ("ÖĞRENCI ADI", 'name'),
+            ("STUDENT NAME", 'name'),
+            ("ÖĞRENCI NO", 'student_id'),
+            ("ÖĞRENCİ NUMARASI", 'student_id'),
+            ("STUDENT ID", 'student_id'),
+            ("KATILIM ONAYI", 'attendance'),
+            ("CONFIRM ATTENDANCE", 'attendance'),
+        ]
+        failed = False
+        for title, expected in cases:
+            m = _FIELD_RE.match(_turkish_lower(title))
+            field = m.lastgroup if m else None
+            if field != expected:
+                print(f"  ❌ '{title}': expected {expected}, got {field}")
+                failed = True
+        
+        if failed:
+            return False
+        print(f"  ✅ {len(cases)} titles classified correctly")
+        return True
+    except Exception as e:
+        print(f"  ❌ Pattern error: {e}")
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def _start_playwright():
+    """Start the Playwright driver once."""
+    from playwright.sync_api import sync_playwright
+    return sync_playwright().start()
+
+
+@functools.lru_cache(maxsize=1)
+def get_browser():
+    """Launch one headless Chromium shared by all browser probes."""
+    return _start_playwright().chromium.launch(headless=True)
+
+
+def close_browser():
+    """Close the shared browser and driver if they were started."""
+    if get_browser.cache_info().currsize:
+        get_browser().close()
+        get_browser.cache_clear()
+    if _start_playwright.cache_info().currsize:
+        _start_playwright().stop()
+        _start_playwright.cache_clear()
+
+
 def test_playwright():
     """Test Playwright browser launch."""
     print("\n🧪 Testing Playwright browser...")
     
     try:
-        from playwright.sync_api import sync_playwright
-        
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto("about:blank")
-            browser.close()
+        page = get_browser().new_page()
+        page.goto("about:blank")
+        page.close()
         
         print("  ✅ Playwright browser working")
         return True
@@ -136,7 +197,11 @@ def main():
     results.append(("Imports", test_imports()))
     results.append(("Configuration", test_config()))
     results.append(("Database", test_database()))
-    results.append(("Playwright", test_playwright()))
+    results.append(("Field patterns", test_field_patterns()))
+    try:
+        results.append(("Playwright", test_playwright()))
+    finally:
+        close_browser()
     
     print("\n" + "=" * 60)
     print("Test Results:")
@@ -1,15 +1,40 @@
-"""Utils module initialization."""
-from .stealth import (
-    configure_stealth_context,
-    get_stealthy_browser_args,
-    get_realistic_viewport,
-    get_realistic_user_agent,
-    get_context_options,
-    add_mouse_jitter,
-)
-from .human_behavior import HumanBehavior, ReadingPatterns
-from .rate_limiter import RateLimiter
-from .notifications import NotificationManager
+"""Utils module initialization.
+
+Submodules are imported lazily on first attribute access, so
+`from utils import RateLimiter` only loads rate_limiter (and not, say,
+the notification backends).
+"""
+import importlib
+
+_LAZY_ATTRS = {
+    "configure_stealth_context": ".stealth",
+    "get_stealthy_browser_args": ".stealth",
+    "get_realistic_viewport": ".stealth",
+    "get_realistic_user_agent": ".stealth",
+    "get_context_options": ".stealth",
+    "add_mouse_jitter": ".stealth",
+    "HumanBehavior": ".human_behavior",
+    "ReadingPatterns": ".human_behavior",
+    "RateLimiter": ".rate_limiter",
+    "NotificationManager": ".notifications",
+    "file_timestamp": ".timestamps",
+    "ScreenshotWriter": ".screenshot_writer",
+    "CAPTCHA_SELECTOR": ".captcha",
+    "CAPTCHA_KEYWORDS": ".captcha",
+    "CAPTCHA_RE": ".captcha",
+    "find_captcha_keyword": ".captcha",
+    "detect_captcha": ".captcha",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "configure_stealth_context",
@@ -22,4 +47,11 @@ __all__ = [
     "ReadingPatterns",
     "RateLimiter",
     "NotificationManager",
+    "file_timestamp",
+    "ScreenshotWriter",
+    "CAPTCHA_SELECTOR",
+    "CAPTCHA_KEYWORDS",
+    "CAPTCHA_RE",
+    "find_captcha_keyword",
+    "detect_captcha",
 ]
@@ -0,0 +1,64 @@
+"""
+CAPTCHA detection helpers evaluated inside the browser.
+"""
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+
+# Known CAPTCHA widgets (one locator query)
+CAPTCHA_SELECTOR = (
+    'iframe[src*="recaptcha"], iframe[src*="hcaptcha"], '
+    'div.g-recaptcha, [data-sitekey]'
+)
+
+# Page text hints for other CAPTCHA challenges
+CAPTCHA_KEYWORDS = ['captcha', 'robot', 'verify you are human']
+
+# All keywords in one case-insensitive pattern (single scan, no lowercased copy)
+CAPTCHA_RE = re.compile('|'.join(map(re.escape, CAPTCHA_KEYWORDS)), re.IGNORECASE)
+
+_FIND_KEYWORD_JS = """(src) => {
+    const m = new RegExp(src, 'i').exec(document.body.innerText);
+    return m ? m[0].toLowerCase() : '';
+}"""
+
+# Widget selector and keyword scan in one round trip
+_DETECT_JS = """([selector, src]) => {
+    if (document.querySelector(selector)) return 'widget';
+    const m = new RegExp(src, 'i').exec(document.body.innerText);
+    return m ? 'keyword: ' + m[0].toLowerCase() : '';
+}"""
+
+
+def detect_captcha(page: Page) -> str:
+    """
+    Check for CAPTCHA widgets and keywords with a single page evaluation.
+    
+    Args:
+        page: Playwright page instance
+        
+    Returns:
+        What gave the CAPTCHA away ('widget' or 'keyword: ...'), or empty string
+    """
+    return page.evaluate(_DETECT_JS, [CAPTCHA_SELECTOR, CAPTCHA_RE.pattern])
+
+
+def find_captcha_keyword(page: Page, pattern: re.Pattern = CAPTCHA_RE) -> str:
+    """
+    Search page text for CAPTCHA keywords without copying it to Python.
+    
+    The pattern is matched case-insensitively inside the browser.
+    
+    Args:
+        page: Playwright page instance
+        pattern: Compiled keyword pattern (JS-compatible syntax)
+        
+    Returns:
+        Matched keyword (lowercase), or empty string if none found
+    """
+    return page.evaluate(_FIND_KEYWORD_JS, pattern.pattern)
@@ -1,14 +1,42 @@
 """
 Human behavior simulation for realistic browser interactions.
 """
+from __future__ import annotations
+
 import random
 import time
-from typing import Optional
-from playwright.sync_api import Page, Locator
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page, Locator
+
+
+# Own generator for delays and movements, seeded from os.urandom and
+# independent of the global random state
+_rng = random.Random()
+
+
+# Chunked scroll run entirely in the page: one round-trip per scroll,
+# with the per-chunk pauses drawn in Python and slept in the browser
+_CHUNKED_SCROLL_JS = """
+async ([perChunk, pauses]) => {
+    for (const pause of pauses) {
+        window.scrollBy(0, perChunk);
+        await new Promise(resolve => setTimeout(resolve, pause));
+    }
+}
+"""
 
 
 class HumanBehavior:
-    """Simulates human-like behavior in browser automation."""
+    """
+    Simulates human-like behavior in browser automation.
+    
+    Pure think-time pauses use time.sleep() instead of a wait_for_timeout()
+    round-trip. Pauses right after a click stay on page.wait_for_timeout()
+    so route handlers and page events keep being serviced while whatever
+    the click triggered loads.
+    """
     
     @staticmethod
     def random_delay(min_ms: int = 500, max_ms: int = 2000) -> float:
@@ -22,7 +50,21 @@ class HumanBehavior:
         Returns:
             Delay in seconds
         """
-        return random.randint(min_ms, max_ms) / 1000.0
+        return _rng.randint(min_ms, max_ms) / 1000.0
+    
+    @staticmethod
+    def random_delay_ms(min_ms: int = 500, max_ms: int = 2000) -> int:
+        """
+        Get random delay in milliseconds (for page.wait_for_timeout).
+        
+        Args:
+            min_ms: Minimum delay in milliseconds
+            max_ms: Maximum delay in milliseconds
+            
+        Returns:
+            Delay in milliseconds
+        """
+        return _rng.randint(min_ms, max_ms)
     
     @staticmethod
     def typing_delay() -> int:
@@ -34,14 +76,47 @@ class HumanBehavior:
         """
         # Humans type at 40-80 WPM = 200-400ms per char
         # Add variation
-        base_delay = random.randint(50, 150)
+        base_delay = _rng.randint(50, 150)
         
         # Occasionally slow down (thinking)
-        if random.random() < 0.1:  # 10% chance
-            base_delay += random.randint(200, 500)
+        if _rng.random() < 0.1:  # 10% chance
+            base_delay += _rng.randint(200, 500)
         
         return base_delay
     
+    @staticmethod
+    def typing_bursts(text: str) -> list[tuple[str, int]]:
+        """
+        Split text into short typing bursts, each with its own key delay.
+        
+        All random draws are made up front in bulk. Each burst gets a
+        50-150ms per-key delay, and about 10% of bursts get an extra
+        200-500ms (thinking), matching typing_delay()'s distribution but
+        varying it across the text instead of fixing one delay for all.
+        
+        Args:
+            text: Text to type
+            
+        Returns:
+            List of (segment, delay_ms) covering text in order
+        """
+        n = len(text)
+        sizes = _rng.choices(range(2, 6), k=n)
+        delays = _rng.choices(range(50, 151), k=n)
+        thinking = _rng.choices(range(200, 501), k=n)
+        thinks = _rng.choices((False, True), cum_weights=(0.9, 1.0), k=n)  # 10% chance
+        
+        bursts = []
+        pos = 0
+        for size, delay, extra, think in zip(sizes, delays, thinking, thinks):
+            if pos >= n:
+                break
+            if think:
+                delay += extra
+            bursts.append((text[pos:pos + size], delay))
+            pos += size
+        return bursts
+    
     @staticmethod
     def human_click(locator: Locator, page: Page) -> None:
         """
@@ -53,15 +128,15 @@ class HumanBehavior:
         """
         # Scroll into view if needed
         locator.scroll_into_view_if_needed()
-        page.wait_for_timeout(HumanBehavior.random_delay(100, 300) * 1000)
+        time.sleep(HumanBehavior.random_delay(100, 300))
         
         # Hover over element
         locator.hover()
-        page.wait_for_timeout(HumanBehavior.random_delay(200, 500) * 1000)
+        time.sleep(HumanBehavior.random_delay(200, 500))
         
         # Click
         locator.click()
-        page.wait_for_timeout(HumanBehavior.random_delay(300, 800) * 1000)
+        page.wait_for_timeout(HumanBehavior.random_delay_ms(300, 800))
     
     @staticmethod
     def human_type(locator: Locator, text: str, page: Page) -> None:
@@ -78,13 +153,14 @@ class HumanBehavior:
         
         # Clear existing content
         locator.clear()
-        page.wait_for_timeout(HumanBehavior.random_delay(100, 300) * 1000)
+        time.sleep(HumanBehavior.random_delay(100, 300))
         
-        # Type character by character
-        locator.type(text, delay=HumanBehavior.typing_delay())
+        # Type character by character, in bursts with varying speed
+        for segment, delay in HumanBehavior.typing_bursts(text):
+            locator.press_sequentially(segment, delay=delay)
         
         # Random pause after typing
-        page.wait_for_timeout(HumanBehavior.random_delay(300, 700) * 1000)
+        time.sleep(HumanBehavior.random_delay(300, 700))
     
     @staticmethod
     def human_scroll(page: Page, direction: str = "down", amount: int = 300) -> None:
@@ -99,15 +175,14 @@ class HumanBehavior:
         scroll_amount = amount if direction == "down" else -amount
         
         # Scroll in chunks (humans don't scroll in one motion)
-        chunks = random.randint(3, 6)
+        chunks = _rng.randint(3, 6)
         per_chunk = scroll_amount // chunks
         
-        for _ in range(chunks):
-            page.evaluate(f"window.scrollBy(0, {per_chunk})")
-            page.wait_for_timeout(random.randint(50, 150))
+        pauses = _rng.choices(range(50, 151), k=chunks)
+        page.evaluate(_CHUNKED_SCROLL_JS, [per_chunk, pauses])
         
         # Pause after scroll
-        page.wait_for_timeout(HumanBehavior.random_delay(200, 500) * 1000)
+        time.sleep(HumanBehavior.random_delay(200, 500))
     
     @staticmethod
     def random_mouse_movement(page: Page, num_movements: int = 3) -> None:
@@ -120,13 +195,17 @@ class HumanBehavior:
         """
         viewport = page.viewport_size
         
-        for _ in range(num_movements):
-            x = random.randint(100, viewport['width'] - 100)
-            y = random.randint(100, viewport['height'] - 100)
-            
+        # Draw all targets, step counts and pauses up front in bulk
+        k = num_movements
+        xs = _rng.choices(range(100, viewport['width'] - 99), k=k)
+        ys = _rng.choices(range(100, viewport['height'] - 99), k=k)
+        steps = _rng.choices(range(5, 16), k=k)
+        pauses = _rng.choices(range(100, 301), k=k)
+        
+        for x, y, n_steps, pause in zip(xs, ys, steps, pauses):
             # Move mouse in steps (humans don't teleport)
-            page.mouse.move(x, y, steps=random.randint(5, 15))
-            page.wait_for_timeout(random.randint(100, 300))
+            page.mouse.move(x, y, steps=n_steps)
+            page.wait_for_timeout(pause)
     
     @staticmethod
     def reading_pause(page: Page, content_length: Optional[int] = None) -> None:
@@ -146,9 +225,9 @@ class HumanBehavior:
             words = content_length / 5
             seconds = words / 3.3
             # Add randomness
-            pause = seconds * random.uniform(0.7, 1.3)
+            pause = seconds * _rng.uniform(0.7, 1.3)
         
-        page.wait_for_timeout(int(pause * 1000))
+        time.sleep(pause)
     
     @staticmethod
     def occasional_mistake() -> bool:
@@ -158,7 +237,7 @@ class HumanBehavior:
         Returns:
             True if should make a mistake (5% chance)
         """
-        return random.random() < 0.05
+        return _rng.random() < 0.05
     
     @staticmethod
     def checkbox_with_verification(locator: Locator, page: Page) -> None:
@@ -176,9 +255,9 @@ class HumanBehavior:
         
         if not is_checked:
             # Try again if not checked (occasional click miss)
-            page.wait_for_timeout(HumanBehavior.random_delay(500, 1000) * 1000)
+            page.wait_for_timeout(HumanBehavior.random_delay_ms(500, 1000))
             locator.check()
-            page.wait_for_timeout(HumanBehavior.random_delay(300, 600) * 1000)
+            page.wait_for_timeout(HumanBehavior.random_delay_ms(300, 600))
 
 
 class ReadingPatterns:
@@ -194,17 +273,17 @@ class ReadingPatterns:
         """
         # Scroll to top
         page.evaluate("window.scrollTo(0, 0)")
-        page.wait_for_timeout(HumanBehavior.random_delay(300, 600) * 1000)
+        time.sleep(HumanBehavior.random_delay(300, 600))
         
         # Scroll through form
         HumanBehavior.human_scroll(page, "down", 200)
         HumanBehavior.reading_pause(page)
         
         # Maybe scroll back up
-        if random.random() < 0.3:  # 30% chance
+        if _rng.random() < 0.3:  # 30% chance
             HumanBehavior.human_scroll(page, "up", 100)
-            page.wait_for_timeout(HumanBehavior.random_delay(200, 400) * 1000)
+            time.sleep(HumanBehavior.random_delay(200, 400))
         
         # Scroll to top again
         page.evaluate("window.scrollTo(0, 0)")
-        page.wait_for_timeout(HumanBehavior.random_delay(200, 400) * 1000)
+        time.sleep(HumanBehavior.random_delay(200, 400))
@@ -1,23 +1,230 @@
 """
 Notification system for desktop and Telegram alerts.
 """
+from __future__ import annotations
+
+import functools
 import os
-from typing import Optional
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
+from typing import Callable, Optional, TYPE_CHECKING
 from loguru import logger
 
-try:
-    from plyer import notification
-    PLYER_AVAILABLE = True
-except ImportError:
-    PLYER_AVAILABLE = False
-    logger.warning("plyer not installed - desktop notifications disabled")
+if TYPE_CHECKING:
+    import requests
+
+
+# plyer (dbus / win32 backends) and requests are imported on first use, so
+# a run with notifications disabled never loads them
+
+@functools.lru_cache(maxsize=1)
+def _plyer_notify() -> Optional[Callable[..., None]]:
+    """Import plyer once and return its bound notify function (None if missing)."""
+    try:
+        from plyer import notification
+    except ImportError:
+        logger.warning("plyer not installed - desktop notifications disabled")
+        return None
+    return notification.notify
+
+
+@functools.lru_cache(maxsize=1)
+def _requests_available() -> bool:
+    """Import requests once and report whether Telegram can be used."""
+    try:
+        import requests  # noqa: F401
+    except ImportError:
+        logger.warning("requests not installed - Telegram notifications disabled")
+        return False
+    return True
 
-try:
+
+# Telegram Bot API limits: ~30 messages/s overall, 1 message/s per chat
+TELEGRAM_MAX_PER_SECOND = 30
+TELEGRAM_CHAT_INTERVAL = 1.0
+
+# Separate connect/read timeouts for Telegram API calls
+TELEGRAM_TIMEOUT = (3, 7)
+
+# How often one message is re-sent after a 429 (after waiting retry_after)
+TELEGRAM_429_RETRIES = 2
+
+# Telegram message templates (HTML parse mode)
+_TPL_SUCCESS = Template(
+    "✅ <b>Form Başarıyla Gönderildi</b>\n"
+    "\n"
+    "👤 <b>Öğrenci:</b> $name\n"
+    "🔗 <b>URL:</b> $url...\n"
+    "⏱️ <b>Süre:</b> $secs saniye"
+)
+_TPL_ERROR = Template(
+    "❌ <b>Hata Oluştu</b>\n"
+    "\n"
+    "🔴 <b>Hata Tipi:</b> $error_type"
+)
+_TPL_ERROR_URL = Template("\n🔗 <b>URL:</b> $url...")
+_TPL_ERROR_DETAIL = Template("\n📝 <b>Detay:</b> $detail")
+_TPL_CAPTCHA = Template(
+    "🔴 <b>CAPTCHA ALGILANDI!</b>\n"
+    "\n"
+    "⚠️ Manuel müdahale gerekli\n"
+    "🔗 <b>URL:</b> $url...\n"
+    "\n"
+    "Lütfen tarayıcıda CAPTCHA'yı çözün."
+)
+_TPL_DAILY_SUMMARY = Template(
+    "📊 <b>Günlük Rapor</b>\n"
+    "\n"
+    "📝 <b>Toplam Form:</b> $total\n"
+    "✅ <b>Başarılı:</b> $successful ($rate%)\n"
+    "❌ <b>Başarısız:</b> $failed\n"
+    "🔴 <b>CAPTCHA:</b> $captcha"
+)
+
+
+def _new_telegram_session() -> requests.Session:
+    """
+    Create a keep-alive session for the Telegram API.
+    
+    Connections (and TLS) are reused across messages; 5xx replies are
+    retried with exponential backoff. 429s are left to _TelegramQueue,
+    which pauses the whole queue for the advertised retry_after.
+    """
     import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
-    logger.warning("requests not installed - Telegram notifications disabled")
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=frozenset({'POST'}),
+        raise_on_status=False,  # hand the last reply to raise_for_status()
+    )
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+
+def _retry_after(response: requests.Response) -> float:
+    """Seconds to back off after a 429 (JSON parameters.retry_after, then header)."""
+    try:
+        return float(response.json()['parameters']['retry_after'])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        return float(response.headers.get('Retry-After', 1))
+    except ValueError:
+        return 1.0
+
+
+class _TelegramQueue:
+    """
+    Sends queued Telegram messages from one background thread.
+    
+    Sends are spaced to stay under the Bot API limits, so bursts of
+    notifications neither block the caller nor trigger 429 responses.
+    Messages queued with a coalesce key replace an unsent message with
+    the same key instead of queueing behind it.
+    """
+    
+    def __init__(self):
+        """Start the sender thread."""
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: dict[str, dict] = {}  # coalesce key -> latest payload
+        self._pending_lock = threading.Lock()
+        self._sent: deque[float] = deque()  # monotonic send times, last second
+        self._last_by_chat: dict[str, float] = {}
+        self._resume_at = 0.0  # monotonic time a 429 told us to wait until
+        self._thread = threading.Thread(
+            target=self._run,
+            name="telegram-sender",
+            daemon=True,
+        )
+        self._thread.start()
+    
+    def put(self, url: str, payload: dict, coalesce_key: Optional[str] = None) -> None:
+        """
+        Queue one sendMessage request.
+        
+        Args:
+            url: sendMessage endpoint
+            payload: Request body
+            coalesce_key: If set, an unsent message with this key is
+                replaced by this one (only the latest is sent)
+        """
+        if coalesce_key is None:
+            self._queue.put((url, payload, None))
+            return
+        
+        with self._pending_lock:
+            queued = coalesce_key in self._pending
+            self._pending[coalesce_key] = payload
+        if not queued:
+            self._queue.put((url, None, coalesce_key))
+    
+    def close(self, timeout: float = 10.0) -> None:
+        """Send what is queued (up to timeout seconds) and stop the thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+    
+    def _wait_for_slot(self, chat_id: str) -> float:
+        """Sleep until both rate limits allow a send; return the send time."""
+        while True:
+            now = time.monotonic()
+            while self._sent and self._sent[0] <= now - 1.0:
+                self._sent.popleft()
+            
+            send_at = max(
+                self._resume_at,
+                self._last_by_chat.get(chat_id, 0.0) + TELEGRAM_CHAT_INTERVAL,
+            )
+            if len(self._sent) >= TELEGRAM_MAX_PER_SECOND:
+                send_at = max(send_at, self._sent[0] + 1.0)
+            if send_at <= now:
+                return now
+            time.sleep(send_at - now)
+    
+    def _run(self) -> None:
+        """Sender loop."""
+        session = _new_telegram_session()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            url, payload, coalesce_key = item
+            if coalesce_key is not None:
+                with self._pending_lock:
+                    payload = self._pending.pop(coalesce_key)
+            
+            try:
+                self._send(session, url, payload)
+                logger.debug("Telegram message sent successfully")
+            except Exception as e:
+                logger.error(f"Failed to send Telegram message: {e}")
+        session.close()
+    
+    def _send(self, session: requests.Session, url: str, payload: dict) -> None:
+        """Post one message, waiting out and retrying 429 replies."""
+        chat_id = payload['chat_id']
+        for _ in range(TELEGRAM_429_RETRIES + 1):
+            now = self._wait_for_slot(chat_id)
+            self._sent.append(now)
+            self._last_by_chat[chat_id] = now
+            
+            response = session.post(url, json=payload, timeout=TELEGRAM_TIMEOUT)
+            if response.status_code != 429:
+                break
+            
+            # Throttled: hold every send (not just this chat) for retry_after
+            retry_after = _retry_after(response)
+            self._resume_at = time.monotonic() + retry_after
+            logger.warning(f"Telegram rate limit hit - pausing sends for {retry_after:g}s")
+        response.raise_for_status()
 
 
 class NotificationManager:
@@ -37,13 +244,20 @@ class NotificationManager:
             telegram_bot_token: Telegram bot token (optional)
             telegram_chat_id: Telegram chat ID (optional)
         """
-        self.enable_desktop = enable_desktop and PLYER_AVAILABLE
+        self.enable_desktop = enable_desktop and _plyer_notify() is not None
         self.telegram_bot_token = telegram_bot_token
         self.telegram_chat_id = telegram_chat_id
         self.telegram_enabled = (
-            REQUESTS_AVAILABLE and
             telegram_bot_token is not None and
-            telegram_chat_id is not None
+            telegram_chat_id is not None and
+            _requests_available()
+        )
+        self._telegram_queue = _TelegramQueue() if self.telegram_enabled else None
+        
+        # plyer shells out (notify-send / dbus / win32) - keep it off the caller
+        self._desktop_pool = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="desktop-notify")
+            if self.enable_desktop else None
         )
     
     def send_desktop_notification(
@@ -53,18 +267,23 @@ class NotificationManager:
         timeout: int = 10
     ) -> None:
         """
-        Send desktop notification.
+        Send desktop notification (fire-and-forget, shown by a worker thread).
         
         Args:
             title: Notification title
             message: Notification message
             timeout: Notification display time in seconds
         """
-        if not self.enable_desktop or not PLYER_AVAILABLE:
+        if not self.enable_desktop:
             return
         
+        self._desktop_pool.submit(self._send_desktop_sync, title, message, timeout)
+    
+    @staticmethod
+    def _send_desktop_sync(title: str, message: str, timeout: int) -> None:
+        """Show a desktop notification (runs on the notification thread)."""
         try:
-            notification.notify(
+            _plyer_notify()(
                 title=title,
                 message=message,
                 app_name="WhatsApp Form Filler",
@@ -77,17 +296,19 @@ class NotificationManager:
     def send_telegram_message(
         self,
         message: str,
-        parse_mode: str = "HTML"
+        parse_mode: str = "HTML",
+        coalesce_key: Optional[str] = None
     ) -> bool:
         """
-        Send Telegram message.
+        Queue a Telegram message (sent by a background thread).
         
         Args:
             message: Message text (supports HTML formatting)
             parse_mode: 'HTML' or 'Markdown'
+            coalesce_key: Replace a still-unsent message with the same key
             
         Returns:
-            True if sent successfully
+            True if queued, False if Telegram is not configured
         """
         if not self.telegram_enabled:
             return False
@@ -100,14 +321,15 @@ class NotificationManager:
             'parse_mode': parse_mode
         }
         
-        try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            logger.debug("Telegram message sent successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send Telegram message: {e}")
-            return False
+        self._telegram_queue.put(url, payload, coalesce_key)
+        return True
+    
+    def close(self) -> None:
+        """Deliver queued notifications and stop the background threads."""
+        if self._desktop_pool is not None:
+            self._desktop_pool.shutdown(wait=True)
+        if self._telegram_queue is not None:
+            self._telegram_queue.close()
     
     def notify_success(
         self,
@@ -129,13 +351,11 @@ class NotificationManager:
         self.send_desktop_notification(title, message)
         
         if self.telegram_enabled:
-            telegram_msg = f"""
-✅ <b>Form Başarıyla Gönderildi</b>
-
-👤 <b>Öğrenci:</b> {student_name}
-🔗 <b>URL:</b> {form_url[:50]}...
-⏱️ <b>Süre:</b> {processing_time:.1f} saniye
-            """.strip()
+            telegram_msg = _TPL_SUCCESS.substitute(
+                name=student_name,
+                url=form_url[:50],
+                secs=f"{processing_time:.1f}",
+            )
             self.send_telegram_message(telegram_msg)
     
     def notify_error(
@@ -158,19 +378,20 @@ class NotificationManager:
         self.send_desktop_notification(title, message, timeout=15)
         
         if self.telegram_enabled:
-            telegram_msg = f"""
-❌ <b>Hata Oluştu</b>
-
-🔴 <b>Hata Tipi:</b> {error_type}
-            """
+            telegram_msg = _TPL_ERROR.substitute(error_type=error_type)
             
             if form_url:
-                telegram_msg += f"\n🔗 <b>URL:</b> {form_url[:50]}..."
+                telegram_msg += _TPL_ERROR_URL.substitute(url=form_url[:50])
             
             if error_message:
-                telegram_msg += f"\n📝 <b>Detay:</b> {error_message[:200]}"
+                telegram_msg += _TPL_ERROR_DETAIL.substitute(detail=error_message[:200])
             
-            self.send_telegram_message(telegram_msg)
+            # Repeated errors for one form while the queue is backed up:
+            # only the latest is worth sending
+            self.send_telegram_message(
+                telegram_msg,
+                coalesce_key=f"error:{form_url}" if form_url else None,
+            )
     
     def notify_captcha(self, form_url: str) -> None:
         """
@@ -185,14 +406,7 @@ class NotificationManager:
         self.send_desktop_notification(title, message, timeout=60)
         
         if self.telegram_enabled:
-            telegram_msg = f"""
-🔴 <b>CAPTCHA ALGILANDI!</b>
-
-⚠️ Manuel müdahale gerekli
-🔗 <b>URL:</b> {form_url[:50]}...
-
-Lütfen tarayıcıda CAPTCHA'yı çözün.
-            """.strip()
+            telegram_msg = _TPL_CAPTCHA.substitute(url=form_url[:50])
             self.send_telegram_message(telegram_msg)
         
         # Also log loudly
@@ -230,13 +444,12 @@ Lütfen tarayıcıda CAPTCHA'yı çözün.
         if self.telegram_enabled:
             success_rate = (successful / total * 100) if total > 0 else 0
             
-            telegram_msg = f"""
-📊 <b>Günlük Rapor</b>
-
-📝 <b>Toplam Form:</b> {total}
-✅ <b>Başarılı:</b> {successful} ({success_rate:.1f}%)
-❌ <b>Başarısız:</b> {failed}
-🔴 <b>CAPTCHA:</b> {captcha_count}
-            """.strip()
+            telegram_msg = _TPL_DAILY_SUMMARY.substitute(
+                total=total,
+                successful=successful,
+                rate=f"{success_rate:.1f}",
+                failed=failed,
+                captcha=captcha_count,
+            )
             
             self.send_telegram_message(telegram_msg)
@@ -2,11 +2,18 @@
 Rate limiting to prevent WhatsApp bans and Microsoft Forms blocks.
 """
 import time
-from datetime import datetime, timedelta
+from collections import deque
 from typing import Optional
 from loguru import logger
 
 
+# Adaptive pacing: failures multiply the minimum delay, successes walk it
+# back down additively. The configured min_delay_seconds is the floor.
+BACKOFF_FACTOR = 2.0
+RECOVERY_STEP = 0.5
+MAX_DELAY_FACTOR = 8.0
+
+
 class RateLimiter:
     """
     Controls the rate of form submissions to avoid detection.
@@ -33,9 +40,39 @@ class RateLimiter:
         self.break_after_n = break_after_n
         self.break_duration_seconds = break_duration_seconds
         
-        self.last_submission: Optional[datetime] = None
+        # time.monotonic() timestamps; hourly_submissions is oldest-first
+        self.last_submission: Optional[float] = None
         self.consecutive_count = 0
-        self.hourly_submissions: list[datetime] = []
+        self.hourly_submissions: deque[float] = deque()
+        
+        # Multiplier on min_delay_seconds (1.0 = configured pace)
+        self.delay_factor = 1.0
+        
+        # Earliest time.monotonic() at which the delay/hourly limits allow a submission
+        self._next_allowed = 0.0
+    
+    @property
+    def current_delay(self) -> float:
+        """Minimum seconds between submissions after adaptive backoff."""
+        return self.min_delay_seconds * self.delay_factor
+    
+    def _prune(self, now: float) -> None:
+        """Drop submissions that have left the one-hour window."""
+        window_start = now - 3600
+        while self.hourly_submissions and self.hourly_submissions[0] <= window_start:
+            self.hourly_submissions.popleft()
+    
+    def needs_wait(self) -> bool:
+        """
+        Cheap check whether wait_if_needed() would have to wait.
+        
+        Returns:
+            True if a break is due or the next slot is still in the future
+        """
+        return (
+            self.consecutive_count >= self.break_after_n
+            or time.monotonic() < self._next_allowed
+        )
     
     def can_proceed(self) -> bool:
         """
@@ -44,99 +81,128 @@ class RateLimiter:
         Returns:
             True if can proceed, False if need to wait
         """
-        now = datetime.now()
+        now = time.monotonic()
         
         # Check minimum delay
-        if self.last_submission:
-            elapsed = (now - self.last_submission).total_seconds()
-            if elapsed < self.min_delay_seconds:
+        if self.last_submission is not None:
+            elapsed = now - self.last_submission
+            if elapsed < self.current_delay:
+                # Arguments are only formatted if a sink takes the record
                 logger.warning(
-                    f"Rate limit: Need to wait {self.min_delay_seconds - elapsed:.1f}s more"
+                    "Rate limit: Need to wait {:.1f}s more",
+                    self.current_delay - elapsed,
                 )
                 return False
         
         # Check hourly limit
-        one_hour_ago = now - timedelta(hours=1)
-        self.hourly_submissions = [
-            ts for ts in self.hourly_submissions
-            if ts > one_hour_ago
-        ]
+        self._prune(now)
         
         if len(self.hourly_submissions) >= self.max_per_hour:
-            oldest = min(self.hourly_submissions)
-            wait_until = oldest + timedelta(hours=1)
-            wait_seconds = (wait_until - now).total_seconds()
+            wait_seconds = self.hourly_submissions[0] + 3600 - now
             logger.warning(
-                f"Rate limit: Hourly limit reached. Wait {wait_seconds:.0f}s"
+                "Rate limit: Hourly limit reached. Wait {:.0f}s",
+                wait_seconds,
             )
             return False
         
         # Check if need break
         if self.consecutive_count >= self.break_after_n:
             logger.info(
-                f"Taking mandatory break after {self.consecutive_count} submissions "
-                f"for {self.break_duration_seconds}s"
+                "Taking mandatory break after {} submissions for {}s",
+                self.consecutive_count,
+                self.break_duration_seconds,
             )
             return False
         
         return True
     
+    def _next_available_at(self, now: float) -> float:
+        """
+        Earliest time.monotonic() at which the delay and hourly limits allow a submission.
+        
+        Args:
+            now: Current time.monotonic()
+            
+        Returns:
+            Monotonic timestamp (<= now if a submission is allowed already)
+        """
+        available_at = now
+        if self.last_submission is not None:
+            available_at = self.last_submission + self.current_delay
+        
+        self._prune(now)
+        if len(self.hourly_submissions) >= self.max_per_hour:
+            # Slot frees up when the oldest in-window submission expires
+            available_at = max(available_at, self.hourly_submissions[0] + 3600)
+        
+        return available_at
+    
     def wait_if_needed(self) -> None:
         """
         Block until we can proceed (with logging).
         """
-        while not self.can_proceed():
-            # Check if need break
-            if self.consecutive_count >= self.break_after_n:
-                logger.info(f"🛑 BREAK TIME: {self.break_duration_seconds}s rest")
-                time.sleep(self.break_duration_seconds)
-                self.consecutive_count = 0
-                logger.info("✅ Break complete, resuming...")
-                continue
-            
-            # Check minimum delay
-            if self.last_submission:
-                now = datetime.now()
-                elapsed = (now - self.last_submission).total_seconds()
-                if elapsed < self.min_delay_seconds:
-                    wait_time = self.min_delay_seconds - elapsed
-                    logger.info(f"⏳ Waiting {wait_time:.1f}s before next submission...")
-                    time.sleep(wait_time)
-                    continue
-            
-            # Check hourly limit
-            now = datetime.now()
-            one_hour_ago = now - timedelta(hours=1)
-            self.hourly_submissions = [
-                ts for ts in self.hourly_submissions
-                if ts > one_hour_ago
-            ]
-            
-            if len(self.hourly_submissions) >= self.max_per_hour:
-                oldest = min(self.hourly_submissions)
-                wait_until = oldest + timedelta(hours=1)
-                wait_seconds = (wait_until - now).total_seconds()
-                logger.warning(
-                    f"⏱️  Hourly limit reached. Waiting {wait_seconds/60:.1f} minutes..."
-                )
-                time.sleep(min(wait_seconds, 60))  # Check every minute
-                continue
-            
-            break
+        # Check if need break
+        if self.consecutive_count >= self.break_after_n:
+            logger.info("🛑 BREAK TIME: {}s rest", self.break_duration_seconds)
+            time.sleep(self.break_duration_seconds)
+            self.consecutive_count = 0
+            logger.info("✅ Break complete, resuming...")
+        
+        # Sleep once until the delay and hourly limits both allow a submission
+        now = time.monotonic()
+        wait_seconds = self._next_available_at(now) - now
+        if wait_seconds > 0:
+            eta = time.strftime('%H:%M:%S', time.localtime(time.time() + wait_seconds))
+            logger.info(
+                "⏳ Waiting {:.1f}s before next submission (until {})...",
+                wait_seconds,
+                eta,
+            )
+            time.sleep(wait_seconds)
     
     def record_submission(self) -> None:
         """
         Record that a submission occurred.
         """
-        now = datetime.now()
+        now = time.monotonic()
         self.last_submission = now
         self.consecutive_count += 1
         self.hourly_submissions.append(now)
+        self._prune(now)
+        
+        # Successful submission: ease back toward the configured pace
+        self.delay_factor = max(1.0, self.delay_factor - RECOVERY_STEP)
+        
+        # Precompute the next free slot so needs_wait() is a single comparison
+        next_allowed = now + self.current_delay
+        if len(self.hourly_submissions) >= self.max_per_hour:
+            # Same slot can_proceed() waits for: oldest in-window submission + 1h
+            next_allowed = max(next_allowed, self.hourly_submissions[0] + 3600)
+        self._next_allowed = next_allowed
+        
+        logger.debug(
+            "📊 Rate limiter stats: consecutive={}, hourly={}/{}",
+            self.consecutive_count,
+            len(self.hourly_submissions),
+            self.max_per_hour,
+        )
+    
+    def record_failure(self) -> None:
+        """
+        Record a failed attempt (block, CAPTCHA, error) and slow down.
+        
+        The attempt does not count toward the hourly or consecutive limits,
+        but the next submission waits the backed-off delay from now.
+        """
+        now = time.monotonic()
+        self.last_submission = now
+        self.delay_factor = min(MAX_DELAY_FACTOR, self.delay_factor * BACKOFF_FACTOR)
+        self._next_allowed = max(self._next_allowed, now + self.current_delay)
         
-        logger.info(
-            f"📊 Rate limiter stats: "
-            f"consecutive={self.consecutive_count}, "
-            f"hourly={len(self.hourly_submissions)}/{self.max_per_hour}"
+        logger.warning(
+            "🐢 Backing off: next submission in {:.0f}s (x{:g} delay)",
+            self.current_delay,
+            self.delay_factor,
         )
     
     def reset_consecutive(self) -> None:
@@ -153,23 +219,20 @@ class RateLimiter:
         Returns:
             Dictionary with stats
         """
-        now = datetime.now()
-        one_hour_ago = now - timedelta(hours=1)
+        now = time.monotonic()
         
         # Clean old submissions
-        self.hourly_submissions = [
-            ts for ts in self.hourly_submissions
-            if ts > one_hour_ago
-        ]
+        self._prune(now)
         
         time_since_last = None
-        if self.last_submission:
-            time_since_last = (now - self.last_submission).total_seconds()
+        if self.last_submission is not None:
+            time_since_last = now - self.last_submission
         
         return {
             'consecutive_count': self.consecutive_count,
             'hourly_count': len(self.hourly_submissions),
             'max_per_hour': self.max_per_hour,
+            'delay_factor': self.delay_factor,
             'time_since_last_submission': time_since_last,
             'can_proceed': self.can_proceed(),
             'need_break': self.consecutive_count >= self.break_after_n,
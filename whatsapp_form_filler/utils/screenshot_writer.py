@@ -0,0 +1,69 @@
+"""
+Background screenshot writer - keeps file I/O off the browser thread.
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from loguru import logger
+
+
+def _write_file(path: str, data: bytes) -> None:
+    """Write bytes to a new file with a single write call."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+class ScreenshotWriter:
+    """
+    Writes screenshot bytes to disk on one background thread.
+    
+    Callers get the target path back immediately; flush() blocks
+    until everything submitted so far is on disk.
+    """
+    
+    def __init__(self):
+        """Initialize screenshot writer."""
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot-writer")
+        self._pending: set[Future] = set()
+        self._lock = threading.Lock()
+    
+    def submit(self, path: str, data: bytes) -> Future:
+        """
+        Queue bytes to be written to path.
+        
+        Args:
+            path: Target file path
+            data: Encoded image bytes
+        
+        Returns:
+            Future that completes when the file is written
+        """
+        future = self._pool.submit(_write_file, path, data)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(lambda f: self._on_done(f, path))
+        return future
+    
+    def _on_done(self, future: Future, path: str) -> None:
+        """Forget a finished write and report failures."""
+        with self._lock:
+            self._pending.discard(future)
+        error = future.exception()
+        if error:
+            logger.error(f"Could not write screenshot {path}: {error}")
+    
+    def flush(self) -> None:
+        """Block until all queued screenshots are written."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+    
+    def close(self) -> None:
+        """Drain pending writes and stop the writer thread."""
+        self._pool.shutdown(wait=True)
@@ -1,47 +1,94 @@
 """
 Stealth mode configuration for Playwright to avoid bot detection.
 """
-from playwright.sync_api import Page, BrowserContext, Browser
+from __future__ import annotations
+
+import functools
 import random
+import weakref
+from itertools import accumulate
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page, BrowserContext, Browser
+
+
+# Fingerprint choices use their own generator (seeded from os.urandom)
+_rng = random.Random()
+
+
+# Init script that hides common automation fingerprints. The navigator
+# overrides are batched into one defineProperties call.
+STEALTH_INIT_SCRIPT = """
+// Overwrite `webdriver`, `plugins` and `languages` on navigator
+Object.defineProperties(navigator, {
+    webdriver: { get: () => undefined },
+    plugins: { get: () => [1, 2, 3, 4, 5] },
+    languages: { get: () => ['tr-TR', 'tr', 'en-US', 'en'] },
+});
+
+// Overwrite the `chrome` property
+window.chrome = {
+    runtime: {},
+};
+
+// Overwrite the `permissions` property
+const originalQuery = window.navigator.permissions.query;
+window.navigator.permissions.query = (parameters) => (
+    parameters.name === 'notifications' ?
+        Promise.resolve({ state: Notification.permission }) :
+        originalQuery(parameters)
+);
+"""
+
+
+# Common resolutions, weighted by rough desktop market share
+_VIEWPORTS = (
+    {'width': 1920, 'height': 1080},  # 1080p
+    {'width': 1366, 'height': 768},   # Common laptop
+    {'width': 1536, 'height': 864},   # Surface
+    {'width': 1440, 'height': 900},   # MacBook
+)
+_VIEWPORT_CUM_WEIGHTS = tuple(accumulate((0.45, 0.25, 0.15, 0.15)))
+
+# Real user agents - Windows Chrome, weighted toward the current release
+_USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+)
+_USER_AGENT_CUM_WEIGHTS = tuple(accumulate((0.5, 0.2, 0.3)))
+
+# Sent with every request; shared by all contexts, do not mutate
+_EXTRA_HTTP_HEADERS = {
+    'Accept-Language': 'tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+# Contexts that already carry STEALTH_INIT_SCRIPT (entries drop on GC)
+_stealth_contexts: weakref.WeakSet = weakref.WeakSet()
 
 
 def configure_stealth_context(context: BrowserContext) -> None:
     """
     Configure browser context with anti-detection measures.
     
+    Safe to call more than once; the script is only registered once.
+    
     Args:
         context: Playwright browser context to configure
     """
+    if context in _stealth_contexts:
+        return
+    
     # Add init script to hide webdriver
-    context.add_init_script("""
-        // Overwrite the `navigator.webdriver` property
-        Object.defineProperty(navigator, 'webdriver', {
-            get: () => undefined,
-        });
-        
-        // Overwrite the `chrome` property
-        window.chrome = {
-            runtime: {},
-        };
-        
-        // Overwrite the `permissions` property
-        const originalQuery = window.navigator.permissions.query;
-        window.navigator.permissions.query = (parameters) => (
-            parameters.name === 'notifications' ?
-                Promise.resolve({ state: Notification.permission }) :
-                originalQuery(parameters)
-        );
-        
-        // Overwrite the `plugins` property
-        Object.defineProperty(navigator, 'plugins', {
-            get: () => [1, 2, 3, 4, 5],
-        });
-        
-        // Overwrite the `languages` property
-        Object.defineProperty(navigator, 'languages', {
-            get: () => ['tr-TR', 'tr', 'en-US', 'en'],
-        });
-    """)
+    context.add_init_script(STEALTH_INIT_SCRIPT)
+    _stealth_contexts.add(context)
 
 
 def get_stealthy_browser_args() -> list[str]:
@@ -72,14 +119,8 @@ def get_realistic_viewport() -> dict:
     Returns:
         Dictionary with width and height
     """
-    # Common resolutions
-    resolutions = [
-        {'width': 1920, 'height': 1080},  # 1080p
-        {'width': 1366, 'height': 768},   # Common laptop
-        {'width': 1536, 'height': 864},   # Surface
-        {'width': 1440, 'height': 900},   # MacBook
-    ]
-    return random.choice(resolutions)
+    # Copy so callers can't alter the shared table
+    return dict(_rng.choices(_VIEWPORTS, cum_weights=_VIEWPORT_CUM_WEIGHTS)[0])
 
 
 def get_realistic_user_agent() -> str:
@@ -89,13 +130,7 @@ def get_realistic_user_agent() -> str:
     Returns:
         User agent string
     """
-    # Real user agents - Windows Chrome
-    user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-    ]
-    return random.choice(user_agents)
+    return _rng.choices(_USER_AGENTS, cum_weights=_USER_AGENT_CUM_WEIGHTS)[0]
 
 
 async def add_mouse_jitter(page: Page) -> None:
@@ -106,29 +141,21 @@ async def add_mouse_jitter(page: Page) -> None:
         page: Playwright page instance
     """
     # Random small mouse movements
-    for _ in range(random.randint(2, 5)):
-        x = random.randint(100, 800)
-        y = random.randint(100, 600)
+    for _ in range(_rng.randint(2, 5)):
+        x = _rng.randint(100, 800)
+        y = _rng.randint(100, 600)
         await page.mouse.move(x, y)
-        await page.wait_for_timeout(random.randint(50, 150))
+        await page.wait_for_timeout(_rng.randint(50, 150))
 
 
-def get_context_options(locale: str = "tr-TR", timezone: str = "Europe/Istanbul") -> dict:
+@functools.lru_cache(maxsize=8)
+def _static_context_options(locale: str, timezone: str) -> dict:
     """
-    Get browser context options with stealth configuration.
+    Context options that only depend on locale and timezone (cached).
     
-    Args:
-        locale: Browser locale
-        timezone: Browser timezone
-        
-    Returns:
-        Dictionary of context options
+    The returned dict and its nested values are shared - merge, don't mutate.
     """
-    viewport = get_realistic_viewport()
-    
     return {
-        'viewport': viewport,
-        'user_agent': get_realistic_user_agent(),
         'locale': locale,
         'timezone_id': timezone,
         'geolocation': {'latitude': 41.0082, 'longitude': 28.9784},  # Istanbul
@@ -138,12 +165,23 @@ def get_context_options(locale: str = "tr-TR", timezone: str = "Europe/Istanbul"
         'is_mobile': False,
         'java_script_enabled': True,
         'accept_downloads': True,
-        'extra_http_headers': {
-            'Accept-Language': 'tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
+        'extra_http_headers': _EXTRA_HTTP_HEADERS,
+    }
+
+
+def get_context_options(locale: str = "tr-TR", timezone: str = "Europe/Istanbul") -> dict:
+    """
+    Get browser context options with stealth configuration.
+    
+    Args:
+        locale: Browser locale
+        timezone: Browser timezone
+        
+    Returns:
+        Dictionary of context options (a fresh top-level dict per call)
+    """
+    return {
+        **_static_context_options(locale, timezone),
+        'viewport': get_realistic_viewport(),
+        'user_agent': get_realistic_user_agent(),
     }
@@ -0,0 +1,24 @@
+"""
+Fast timestamp strings for log and screenshot file names.
+"""
+import time
+
+
+def file_timestamp(sep: str = "") -> str:
+    """
+    Get current local time formatted for file names.
+    
+    Equivalent to strftime("%Y{sep}%m{sep}%d_%H{sep}%M{sep}%S") without
+    the format-string parsing.
+    
+    Args:
+        sep: Separator between date and time components
+        
+    Returns:
+        Timestamp string, e.g. "20260126_204859" or "2026-01-26_20-48-59"
+    """
+    t = time.localtime()
+    return (
+        f"{t.tm_year:04d}{sep}{t.tm_mon:02d}{sep}{t.tm_mday:02d}_"
+        f"{t.tm_hour:02d}{sep}{t.tm_min:02d}{sep}{t.tm_sec:02d}"
+    )
@@ -14,15 +14,15 @@ Usage:
   3. Run: python watch_whatsapp.py
 """
 import time
-from playwright.sync_api import sync_playwright
 from loguru import logger
 import sys
 import re
+import json
 import random  # For human-like random delays
+from collections import OrderedDict, deque
 
 # Configuration
 from config import settings
-from database.models import UserData
 
 # Student info
 STUDENT_NAME = settings.student_name
@@ -32,50 +32,209 @@ STUDENT_ID = settings.student_id
 WHATSAPP_MESSAGE_SELECTOR = 'div[role="row"]'  # Message rows
 WHATSAPP_LINK_SELECTOR = 'a[href*="forms.office.com"]'  # Forms links
 
+# Microsoft Forms selectors
+FORM_QUESTION_SELECTOR = '[data-automation-id="questionItem"]'
+FORM_TITLE_SELECTOR = '[data-automation-id="questionTitle"]'
+FORM_SUBMIT_SELECTOR = 'button[data-automation-id="submitButton"]'
+
+# Question-title keywords per field, as substrings of the lowercased title
+# (checked in this order; 'ad' also matches "adınız", "soyad", ...)
+NAME_FIELD_RE = re.compile('ad|soyad|isim|name')
+ID_FIELD_RE = re.compile('no|numara|öğrenci')
+ATTENDANCE_FIELD_RE = re.compile('katılım|onay|ders|attendance')
+
+# One round-trip for every question's title and which of its inputs exist:
+# textInput is the first of input/textarea present, choice the first
+# present of the checkbox/radio candidates (label as last resort)
+FORM_QUESTIONS_JS = """
+([questionSelector, titleSelector]) => [...document.querySelectorAll(questionSelector)].map(q => {
+    const title = q.querySelector(titleSelector);
+    const first = selectors => selectors.find(sel => q.querySelector(sel)) || null;
+    return {
+        title: title ? title.innerText.toLowerCase() : null,
+        textInput: first(['input', 'textarea']),
+        choice: first([
+            'input[type="checkbox"]', 'input[type="radio"]',
+            '[role="checkbox"]', '[role="radio"]', 'label',
+        ]),
+    };
+})
+"""
+
+# With stealth_level 'off' the text answers are filled in one round-trip:
+# the native value setter plus input/change events, so React registers the
+# change. Returns the indices of fields whose value did not stick.
+FILL_TEXT_FIELDS_JS = """
+([questionSelector, fields]) => {
+    const questions = document.querySelectorAll(questionSelector);
+    const failed = [];
+    for (const f of fields) {
+        const el = questions[f.index] && questions[f.index].querySelector(f.selector);
+        if (!el) { failed.push(f.index); continue; }
+        const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value').set;
+        el.focus();
+        setter.call(el, f.value);
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        if (el.value !== f.value) failed.push(f.index);
+    }
+    return failed;
+}
+"""
+
+# Confirmation after submitting: the thank-you element or any of these
+# keywords (matched in the browser, case-insensitively)
+FORM_THANK_YOU_SELECTOR = '[data-automation-id="thankYouMessage"]'
+SUCCESS_TEXT_RE = re.compile('kaydedildi|teşekkür|recorded|thank', re.IGNORECASE)
+
+# Microsoft Forms links in message text (the pattern is used by FORM_WATCH_JS)
+FORM_URL_RE = re.compile(r'https?://forms\.office\.com/\S+')
+
+# The part of a Forms URL that identifies the form: the short-link code
+# (/r/<code>) or the id parameter of a full ResponsePage link
+FORM_KEY_RE = re.compile(r'/r/([A-Za-z0-9]+)|[?&]id=([^&#\s]+)')
+
+# Most recent forms remembered as processed (oldest are forgotten first)
+PROCESSED_FORMS_MAX = 1024
+
+# Links remembered page-side as already seen (oldest are forgotten first)
+FORM_WATCH_SEEN_MAX = 500
+
+# Runs inside WhatsApp Web: a MutationObserver matches FORM_URL_RE against
+# new message text and pushes links to Python through window.onFormUrl, so
+# the monitor never has to pull the whole page text. Only a message row
+# appended as the last row of the open chat can report a link; links
+# already on screen at install, in history loaded while scrolling up, or
+# in a chat rendered on switching are only marked seen, so stale forms are
+# never filled. Installed as an init script too, so it survives reloads.
+FORM_WATCH_JS = """
+(() => {
+    if (window.__formWatchInstalled) return;
+    window.__formWatchInstalled = true;
+    const re = new RegExp(%s, 'g');
+    const rowSelector = %s;
+    const seenMax = %d;
+    const seen = new Set();
+    const links = text => (text || '').match(re) || [];
+    const remember = url => {
+        seen.delete(url);
+        seen.add(url);
+        if (seen.size > seenMax) seen.delete(seen.values().next().value);
+    };
+    const lastRow = () => {
+        const rows = document.querySelectorAll(rowSelector);
+        return rows[rows.length - 1] || null;
+    };
+    // A single new message: the node is (inside) the last row, or wraps
+    // only that row. Bulk renders hold several rows and are history.
+    const isNewMessage = (node, row) => {
+        if (!row) return false;
+        if (row.contains(node)) return true;
+        return node.contains(row) && node.querySelectorAll(rowSelector).length === 1;
+    };
+    const start = () => {
+        links(document.body.innerText).forEach(remember);
+        new MutationObserver(mutations => {
+            const row = lastRow();
+            let newest = null;
+            for (const m of mutations) {
+                const nodes = m.type === 'characterData' ? [m.target] : m.addedNodes;
+                for (const node of nodes) {
+                    const fresh = isNewMessage(node, row);
+                    for (const url of links(node.textContent)) {
+                        if (fresh && !seen.has(url)) newest = url;
+                        remember(url);
+                    }
+                }
+            }
+            if (newest) window.onFormUrl(newest);
+        }).observe(document.body, {childList: true, subtree: true, characterData: true});
+    };
+    if (document.body) start();
+    else document.addEventListener('DOMContentLoaded', start);
+})()
+""" % (json.dumps(FORM_URL_RE.pattern), json.dumps(WHATSAPP_MESSAGE_SELECTOR), FORM_WATCH_SEEN_MAX)
+
+import functools
 import os
-import subprocess
+import socket
+
+# Common Chrome paths
+CHROME_PATHS = (
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    os.path.expandvars(r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe"),
+)
+
+# Chrome's remote-debugging endpoint, and how long a fresh launch may take
+# before it accepts connections
+CHROME_DEBUG_PORT = 9222
+CHROME_DEBUG_URL = f"http://127.0.0.1:{CHROME_DEBUG_PORT}"
+CHROME_STARTUP_TIMEOUT_SECONDS = 15
+
+
+@functools.lru_cache(maxsize=1)
+def find_chrome():
+    """Return the first existing Chrome executable (probed once), or None."""
+    for path in CHROME_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def bot_profile_dir():
+    """
+    Chrome user-data dir for the bot, created on first use.
+    
+    A separate profile avoids conflicts with the main Chrome, so existing
+    Chrome instances don't need to be killed.
+    """
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    user_data = os.path.join(project_dir, "chrome_data")
+    os.makedirs(user_data, exist_ok=True)
+    return user_data
+
+
+def wait_for_debug_port(timeout=CHROME_STARTUP_TIMEOUT_SECONDS):
+    """
+    Wait until Chrome's debug port accepts connections.
+    
+    Args:
+        timeout: Seconds to keep trying
+    
+    Returns:
+        True once the port is open, False on timeout
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', CHROME_DEBUG_PORT), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
 
 def launch_chrome_debug():
     """Launch Chrome in debug mode automatically."""
-    logger.info("🔧 Attempting to launch Chrome automatically...")
+    import subprocess
     
-    # Common Chrome paths
-    paths = [
-        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-        os.path.expandvars(r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe")
-    ]
+    logger.info("🔧 Attempting to launch Chrome automatically...")
     
-    chrome_path = None
-    for path in paths:
-        if os.path.exists(path):
-            chrome_path = path
-            break
-            
-    if not chrome_path:
-        logger.error("❌ Chrome executable not found!")
-        return False
-
+    chrome_path = find_chrome()
     if not chrome_path:
         logger.error("❌ Chrome executable not found!")
         return False
 
     try:
-        # Use a specific folder for the bot to avoid conflicts with main Chrome
-        # This means we don't need to kill existing Chrome instances!
-        project_dir = os.path.dirname(os.path.abspath(__file__))
-        user_data = os.path.join(project_dir, "chrome_data")
-        
-        # Ensure dir exists
-        if not os.path.exists(user_data):
-            os.makedirs(user_data)
-        
+        user_data = bot_profile_dir()
         logger.info(f"📂 Using bot profile: {user_data}")
         
         # Launch Chrome with isolated profile
         cmd = [
             chrome_path,
-            "--remote-debugging-port=9222",
+            f"--remote-debugging-port={CHROME_DEBUG_PORT}",
             f"--user-data-dir={user_data}",
             "--no-first-run",             # Skip welcome
             "--no-default-browser-check"  # Skip default browser check
@@ -83,8 +242,10 @@ def launch_chrome_debug():
         
         subprocess.Popen(cmd)
         logger.success(f"🚀 Chrome launched!")
-        logger.info("Waiting 5 seconds for Chrome to start...")
-        time.sleep(5)
+        logger.info("Waiting for Chrome to start...")
+        if not wait_for_debug_port():
+            logger.error(f"❌ Chrome did not open port {CHROME_DEBUG_PORT} within {CHROME_STARTUP_TIMEOUT_SECONDS}s")
+            return False
         return True
         
     except Exception as e:
@@ -92,13 +253,113 @@ def launch_chrome_debug():
         return False
 
 
-def extract_form_url(text):
-    """Extract Microsoft Forms URL from text."""
-    # Match forms.office.com URLs
-    pattern = r'https?://forms\.office\.com/[^\s]+'
-    matches = re.findall(pattern, text)
-    # Return the LAST match (most recent message at the bottom)
-    return matches[-1] if matches else None
+# Monitor wait between queue checks: starts short, grows 1.5x while no
+# links arrive (fewer wakeups when idle), resets as soon as one does
+MONITOR_POLL_MIN_SECONDS = 1.0
+MONITOR_POLL_MAX_SECONDS = 5.0
+
+# Humanization pauses are scaled by settings.stealth_level
+PAUSE_SCALE = {'high': 1.0, 'low': 0.25, 'off': 0.0}[settings.stealth_level]
+
+
+def human_sleep(min_seconds, max_seconds, message=None):
+    """
+    Sleep for a random humanization pause, scaled by settings.stealth_level.
+    
+    Args:
+        min_seconds: Shortest pause at stealth_level 'high'
+        max_seconds: Longest pause at stealth_level 'high'
+        message: Optional log line with one {} placeholder for the seconds
+    
+    Returns:
+        Seconds slept (0 when stealth_level is 'off')
+    """
+    seconds = random.uniform(min_seconds, max_seconds) * PAUSE_SCALE
+    if seconds:
+        if message:
+            logger.info(message.format(seconds))
+        time.sleep(seconds)
+    return seconds
+
+
+def form_key(form_url):
+    """Short dedup key for a Forms URL (the whole URL if no id is found)."""
+    m = FORM_KEY_RE.search(form_url)
+    return (m.group(1) or m.group(2)) if m else form_url
+
+
+def install_form_watcher(whatsapp_page):
+    """
+    Start pushing new Forms links from the WhatsApp page.
+    
+    Args:
+        whatsapp_page: WhatsApp Web page
+    
+    Returns:
+        Deque that receives new form URLs (oldest first). Callbacks are
+        delivered while Playwright is busy, e.g. in wait_for_timeout().
+    """
+    new_urls = deque()
+    whatsapp_page.expose_function("onFormUrl", new_urls.append)
+    whatsapp_page.add_init_script(FORM_WATCH_JS)
+    whatsapp_page.evaluate(FORM_WATCH_JS)
+    return new_urls
+
+
+def fill_text_field(input_field, value):
+    """
+    Fill a text input and make sure the value stuck.
+    
+    Args:
+        input_field: Locator for the input or textarea
+        value: Text to enter
+    """
+    from playwright.sync_api import expect
+    
+    logger.info(f"   found input field: {input_field}")
+    
+    # Focus first
+    try:
+        input_field.click(timeout=1000, force=True)
+    except Exception:
+        pass
+    
+    input_field.fill(value)
+    
+    # Auto-retrying value check (instead of sleeping, then reading it once)
+    try:
+        expect(input_field).to_have_value(value, timeout=3000)
+        logger.success(f"   ✅ Verified: {value}")
+    except AssertionError:
+        logger.warning("   ⚠️ Fill failed, trying type strategy...")
+        input_field.clear()
+        input_field.press_sequentially(value)
+    
+    human_sleep(0.5, 1.5)
+
+
+def fill_text_fields_at_once(page, question_items, fields):
+    """
+    Fill several text answers with a single page.evaluate.
+    
+    Fields whose value did not stick are filled one by one instead.
+    
+    Args:
+        page: Form page
+        question_items: Locator for all question items
+        fields: List of {index, selector, value} dicts
+    """
+    if not fields:
+        return
+    
+    failed = set(page.evaluate(FILL_TEXT_FIELDS_JS, [FORM_QUESTION_SELECTOR, fields]))
+    for field in fields:
+        if field['index'] in failed:
+            logger.warning(f"   ⚠️ Batch fill failed for Q{field['index']+1}, filling it directly...")
+            input_field = question_items.nth(field['index']).locator(field['selector']).first
+            fill_text_field(input_field, field['value'])
+        else:
+            logger.success(f"   ✅ Verified: {field['value']}")
 
 
 def fill_form_in_new_tab(browser, form_url):
@@ -112,233 +373,198 @@ def fill_form_in_new_tab(browser, form_url):
     Returns:
         True if successful
     """
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+    
     logger.info(f"📋 Processing form: {form_url}")
     
     # Create new page (tab)
     page = browser.new_page()
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
     
     try:
         # Navigate to form
         logger.info("🌐 Opening form...")
-        page.goto(form_url, wait_until='networkidle', timeout=60000)
+        page.goto(form_url, wait_until='domcontentloaded', timeout=30000)
         
-        # Wait for form to load with retries
+        # The question items are the real readiness signal; networkidle
+        # rarely settles on Microsoft Forms because telemetry keeps firing
         logger.info("⏳ Waiting for form to load...")
         
         form_loaded = False
-        max_attempts = 3
-        
-        for attempt in range(max_attempts):
-            try:
-                # Wait for question items (main indicator form is loaded)
-                page.wait_for_selector('[data-automation-id="questionItem"]', timeout=15000)
-                form_loaded = True
-                logger.success("✅ Form loaded!")
-                break
-            except:
-                logger.warning(f"⚠️  Attempt {attempt + 1}/{max_attempts}: Form not loaded yet...")
-                
-                # Check if login page
-                current_url = page.url
-                if 'login.microsoftonline.com' in current_url or 'login.live.com' in current_url:
-                    logger.warning("🔐 Login page detected! Waiting 30 seconds for manual login...")
-                    logger.info("Please login in the Chrome window!")
-                    time.sleep(30)
-                else:
-                    # Just wait longer
-                    time.sleep(10)
+        try:
+            page.wait_for_selector(FORM_QUESTION_SELECTOR, timeout=30000)
+            form_loaded = True
+        except PlaywrightTimeoutError:
+            # Check if login page
+            current_url = page.url
+            if 'login.microsoftonline.com' in current_url or 'login.live.com' in current_url:
+                logger.warning("🔐 Login page detected! Waiting up to 2 minutes for manual login...")
+                logger.info("Please login in the Chrome window!")
+                try:
+                    page.wait_for_selector(FORM_QUESTION_SELECTOR, timeout=120000)
+                    form_loaded = True
+                except PlaywrightTimeoutError:
+                    pass
         
         if not form_loaded:
-            logger.error("❌ Form did not load after multiple attempts!")
+            logger.error("❌ Form did not load!")
             logger.error(f"Current URL: {page.url}")
-            page.screenshot(path=f'logs/{time.strftime("%Y%m%d_%H%M%S")}_load_failed.png')
+            page.screenshot(path=f'logs/{timestamp}_load_failed.png')
             return False
         
+        logger.success("✅ Form loaded!")
+        
         # Random initial wait AFTER form loads (5-15 seconds) - humans take time to read
-        initial_wait = random.uniform(5, 15)
-        logger.info(f"📖 Reading form for {initial_wait:.1f} seconds...")
-        time.sleep(initial_wait)
+        human_sleep(5, 15, "📖 Reading form for {:.1f} seconds...")
         
-        # Take screenshot with random delay
-        time.sleep(random.uniform(1, 3))
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        page.screenshot(path=f'logs/{timestamp}_before.png')
-        logger.info(f"📸 Screenshot: logs/{timestamp}_before.png")
+        # Take screenshot with random delay (progress screenshots only when
+        # screenshot_on_success is set; failure screenshots are always taken)
+        human_sleep(1, 3)
+        if settings.screenshot_on_success:
+            page.screenshot(path=f'logs/{timestamp}_before.png')
+            logger.info(f"📸 Screenshot: logs/{timestamp}_before.png")
         
         # Random scroll/read delay (humans scroll through form first)
         logger.info("📜 Scrolling through form...")
         page.evaluate("window.scrollTo(0, document.body.scrollHeight / 2)")
-        time.sleep(random.uniform(2, 5))
+        human_sleep(2, 5)
         page.evaluate("window.scrollTo(0, 0)")
-        time.sleep(random.uniform(1, 3))
+        human_sleep(1, 3)
         
         # Find and fill fields
         logger.info("🔍 Analyzing form...")
-        questions = page.query_selector_all('[data-automation-id="questionItem"]')
-        logger.info(f"Found {len(questions)} questions")
+        question_items = page.locator(FORM_QUESTION_SELECTOR)
+        question_info = page.evaluate(
+            FORM_QUESTIONS_JS, [FORM_QUESTION_SELECTOR, FORM_TITLE_SELECTOR]
+        )
+        logger.info(f"Found {len(question_info)} questions")
         
-        if len(questions) == 0:
+        if len(question_info) == 0:
             logger.error("❌ No questions found in form!")
             page.screenshot(path=f'logs/{timestamp}_no_questions.png')
             return False
         
-        for idx, question in enumerate(questions):
+        # Without humanization pauses there is nothing to pace per field, so
+        # text answers are collected and filled together after the loop
+        batch_text_fields = [] if PAUSE_SCALE == 0 else None
+        
+        for idx, info in enumerate(question_info):
             try:
-                title_elem = question.query_selector('[data-automation-id="questionTitle"]')
-                if not title_elem:
+                if info['title'] is None:
                     logger.warning(f"Q{idx+1}: No title element found")
                     continue
                 
-                question_text = title_elem.inner_text().lower()
+                question_text = info['title']
                 logger.info(f"📋 Q{idx+1}: '{question_text}'")
                 
                 # Random thinking delay before filling each field (1-4 seconds)
-                think_delay = random.uniform(1, 4)
-                logger.info(f"🤔 Thinking for {think_delay:.1f}s...")
-                time.sleep(think_delay)
+                human_sleep(1, 4, "🤔 Thinking for {:.1f}s...")
                 
                 # Name field
-                if any(keyword in question_text for keyword in ['ad', 'soyad', 'isim', 'name']):
+                if NAME_FIELD_RE.search(question_text):
                     logger.info(f"🎯 Target: Name Field ({STUDENT_NAME})")
                     
-                    # Try to find any input or textarea in this question block
-                    input_field = question.query_selector('input') or question.query_selector('textarea')
-                    
-                    if input_field:
-                        logger.info(f"   found input field: {input_field}")
-                        
-                        # Focus first
-                        try:
-                            input_field.click(timeout=1000, force=True)
-                        except:
-                            pass
-                            
-                        # Force fill
-                        input_field.fill(STUDENT_NAME)
-                        time.sleep(0.5)
-                        
-                        # VERIFICATION 1: Check value property
-                        val = input_field.input_value()
-                        if val == STUDENT_NAME:
-                            logger.success(f"   ✅ Verified: {val}")
-                        else:
-                            logger.warning(f"   ⚠️ Fill failed, trying type strategy...")
-                            input_field.clear()
-                            input_field.press("Control+A")
-                            input_field.press("Backspace")
-                            input_field.type(STUDENT_NAME, delay=100)
-                            
-                        time.sleep(1)
+                    # Input or textarea found in this question block (if any)
+                    if info['textInput'] and batch_text_fields is not None:
+                        batch_text_fields.append(
+                            {'index': idx, 'selector': info['textInput'], 'value': STUDENT_NAME}
+                        )
+                    elif info['textInput']:
+                        input_field = question_items.nth(idx).locator(info['textInput']).first
+                        fill_text_field(input_field, STUDENT_NAME)
                     else:
                         logger.error("❌ Could not find input field for Name!")
                 
                 # Student ID field
-                elif any(keyword in question_text for keyword in ['no', 'numara', 'öğrenci']):
+                elif ID_FIELD_RE.search(question_text):
                     logger.info(f"🎯 Target: ID Field ({STUDENT_ID})")
                     
-                    input_field = question.query_selector('input') or question.query_selector('textarea')
-                    
-                    if input_field:
-                        logger.info(f"   found input field: {input_field}")
-                        
-                        try:
-                            input_field.click(timeout=1000, force=True)
-                        except:
-                            pass
-                            
-                        input_field.fill(STUDENT_ID)
-                        time.sleep(0.5)
-                        
-                        # VERIFICATION
-                        val = input_field.input_value()
-                        if val == STUDENT_ID:
-                            logger.success(f"   ✅ Verified: {val}")
-                        else:
-                            logger.warning(f"   ⚠️ Fill failed, trying type strategy...")
-                            input_field.clear()
-                            input_field.type(STUDENT_ID, delay=100)
-                            
-                        time.sleep(1)
+                    if info['textInput'] and batch_text_fields is not None:
+                        batch_text_fields.append(
+                            {'index': idx, 'selector': info['textInput'], 'value': STUDENT_ID}
+                        )
+                    elif info['textInput']:
+                        input_field = question_items.nth(idx).locator(info['textInput']).first
+                        fill_text_field(input_field, STUDENT_ID)
                     else:
                         logger.error("❌ Could not find input field for ID!")
                 
                 # Attendance checkbox
-                elif any(keyword in question_text for keyword in ['katılım', 'onay', 'ders', 'attendance']):
-                    # Look for any clickable input, or the label wrapper
-                    checkbox = question.query_selector('input[type="checkbox"]') or question.query_selector('input[type="radio"]')
-                    
-                    if not checkbox:
-                        # Sometimes MS Forms uses divs/labels acting as checkboxes
-                        checkbox = question.query_selector('[role="checkbox"]') or question.query_selector('[role="radio"]')
+                elif ATTENDANCE_FIELD_RE.search(question_text):
+                    # Look for any clickable input (MS Forms sometimes uses
+                    # divs with a checkbox/radio role), or the label wrapper
+                    choice = info['choice']
                     
-                    if checkbox:
+                    if choice and choice != 'label':
+                        checkbox = question_items.nth(idx).locator(choice).first
                         logger.info("✅ Checking attendance")
                         checkbox.hover()
                         checkbox.click(force=True)
                         time.sleep(1)
-                    else:
+                    elif choice:
                         # Last resort: try clicking the first label
-                        lbl = question.query_selector('label')
-                        if lbl:
-                            lbl.click(force=True)
+                        question_items.nth(idx).locator('label').first.click(force=True)
             
             except Exception as e:
                 logger.warning(f"Could not process Q{idx+1}: {e}")
         
+        if batch_text_fields:
+            fill_text_fields_at_once(page, question_items, batch_text_fields)
+        
         # Random review delay before submitting (2-6 seconds)
-        review_delay = random.uniform(2, 6)
-        logger.info(f"👀 Reviewing answers for {review_delay:.1f}s...")
-        time.sleep(review_delay)
+        human_sleep(2, 6, "👀 Reviewing answers for {:.1f}s...")
         
         # Screenshot after filling
-        page.screenshot(path=f'logs/{timestamp}_after.png')
+        if settings.screenshot_on_success:
+            page.screenshot(path=f'logs/{timestamp}_after.png')
         
         # Find and click submit
         logger.info("📤 Submitting form...")
-        submit_btn = page.query_selector('button[data-automation-id="submitButton"]')
-        
-        if not submit_btn:
-            buttons = page.query_selector_all('button')
-            for btn in buttons:
-                if 'gönder' in btn.inner_text().lower() or 'submit' in btn.inner_text().lower():
-                    submit_btn = btn
-                    break
+        submit_btn = (
+            page.query_selector(FORM_SUBMIT_SELECTOR)
+            # Fallback: button text matched in the browser (:has-text ignores case)
+            or page.query_selector('button:has-text("gönder"), button:has-text("submit")')
+        )
         
         if submit_btn:
             # Scroll to submit button
             submit_btn.scroll_into_view_if_needed()
-            time.sleep(random.uniform(0.5, 1.5))
+            human_sleep(0.5, 1.5)
             
             # Hover over button
             submit_btn.hover()
-            time.sleep(random.uniform(0.5, 1.2))
+            human_sleep(0.5, 1.2)
             
             # Click submit
             submit_btn.click()
             logger.success("✅ Submit clicked!")
             
-            # IMPORTANT: Wait longer for submission to process (8-15 seconds)
-            submit_wait = random.uniform(8, 15)
-            logger.info(f"⏳ Waiting {submit_wait:.1f}s for submission to process...")
-            time.sleep(submit_wait)
+            # Wait for the confirmation to show up (instead of a blind sleep
+            # followed by pulling the whole page text)
+            logger.info("⏳ Waiting for submission to process...")
+            try:
+                page.locator(FORM_THANK_YOU_SELECTOR).or_(
+                    page.get_by_text(SUCCESS_TEXT_RE)
+                ).first.wait_for(state='visible', timeout=15000)
+                confirmed = True
+            except PlaywrightTimeoutError:
+                confirmed = False
             
-            # Screenshot confirmation
-            page.screenshot(path=f'logs/{timestamp}_submitted.png')
+            # Screenshot confirmation (always kept as evidence if unconfirmed)
+            if settings.screenshot_on_success or not confirmed:
+                page.screenshot(path=f'logs/{timestamp}_submitted.png')
             
             # Check success
-            page_text = page.inner_text('body').lower()
-            if any(keyword in page_text for keyword in ['kaydedildi', 'teşekkür', 'recorded', 'thank']):
+            if confirmed:
                 logger.success("🎉 Form submitted successfully!")
                 
                 # Random delay before closing (2-5 seconds) - humans read confirmation
-                final_delay = random.uniform(2, 5)
-                logger.info(f"✅ Reading confirmation for {final_delay:.1f}s...")
-                time.sleep(final_delay)
+                human_sleep(2, 5, "✅ Reading confirmation for {:.1f}s...")
                 
                 return True
             else:
                 logger.warning("⚠️  Submitted but no confirmation found")
-                time.sleep(random.uniform(3, 6))
+                human_sleep(3, 6)
                 return True
         else:
             logger.error("❌ Submit button not found")
@@ -356,8 +582,100 @@ def fill_form_in_new_tab(browser, form_url):
         time.sleep(1)
 
 
+def run_monitor(browser):
+    """
+    Watch WhatsApp Web in the connected Chrome and fill every new form.
+    
+    Args:
+        browser: Chrome connected over CDP
+    """
+    # Get all contexts (browser windows)
+    contexts = browser.contexts
+    if not contexts:
+        logger.error("❌ No browser context found. Open Chrome first!")
+        return
+    
+    context = contexts[0]
+    
+    # Find WhatsApp page or create one
+    whatsapp_page = None
+    for page in context.pages:
+        if 'web.whatsapp.com' in page.url:
+            whatsapp_page = page
+            logger.success(f"✅ Found WhatsApp tab: {page.url}")
+            break
+    
+    if not whatsapp_page:
+        logger.warning("⚠️  WhatsApp Web not open. Opening it now...")
+        whatsapp_page = context.new_page()
+        whatsapp_page.goto('https://web.whatsapp.com')
+        logger.info("📱 Please scan QR code to login to WhatsApp Web")
+        time.sleep(10)
+    
+    logger.info("")
+    logger.info("=" * 70)
+    logger.info("🚀 Monitoring started!")
+    logger.info("=" * 70)
+    logger.info("Watching for Microsoft Forms links...")
+    logger.info("Press Ctrl+C to stop")
+    logger.info("")
+    
+    # Forms links are pushed from the page as messages arrive
+    new_urls = install_form_watcher(whatsapp_page)
+    
+    # Track processed forms to avoid duplicates (the page's own record is
+    # lost when WhatsApp reloads); bounded so long sessions don't grow it
+    processed_forms = OrderedDict()
+    
+    # Monitor loop
+    poll_interval = MONITOR_POLL_MIN_SECONDS
+    while True:
+        try:
+            # Let Playwright deliver the observer's callbacks
+            whatsapp_page.wait_for_timeout(poll_interval * 1000)
+            
+            if new_urls:
+                poll_interval = MONITOR_POLL_MIN_SECONDS
+            else:
+                poll_interval = min(poll_interval * 1.5, MONITOR_POLL_MAX_SECONDS)
+            
+            while new_urls:
+                form_url = new_urls.popleft()
+                key = form_key(form_url)
+                if key in processed_forms:
+                    continue
+                
+                logger.success(f"\n🔔 NEW FORM DETECTED!")
+                logger.info(f"URL: {form_url}\n")
+                
+                # Process the form
+                success = fill_form_in_new_tab(context, form_url)
+                
+                if success:
+                    logger.success("✅ Form processed successfully!\n")
+                else:
+                    logger.error("❌ Form processing failed!\n")
+                
+                # Mark as processed
+                processed_forms[key] = None
+                if len(processed_forms) > PROCESSED_FORMS_MAX:
+                    processed_forms.popitem(last=False)
+                
+                logger.info("Continuing to monitor...\n")
+        
+        except KeyboardInterrupt:
+            logger.info("\n\n👋 Stopping monitor...")
+            break
+        except Exception as e:
+            logger.error(f"Error in monitor loop: {e}")
+            time.sleep(10)
+
+
 def watch_whatsapp():
     """Monitor WhatsApp Web for form links."""
+    # Playwright is imported on first use, not at module load, so the
+    # script starts printing (and Chrome starts launching) sooner
+    from playwright.sync_api import sync_playwright
     
     logger.info("=" * 70)
     logger.info("👁️  WhatsApp Monitor Started")
@@ -372,137 +690,30 @@ def watch_whatsapp():
     with sync_playwright() as p:
         try:
             # Connect to existing Chrome instance
-            browser = p.chromium.connect_over_cdp("http://127.0.0.1:9222")
+            browser = p.chromium.connect_over_cdp(CHROME_DEBUG_URL)
             logger.success("✅ Connected to Chrome!")
-            
-            # Get all contexts (browser windows)
-            contexts = browser.contexts
-            if not contexts:
-                logger.error("❌ No browser context found. Open Chrome first!")
-                return
-            
-            context = contexts[0]
-            
-            # Find WhatsApp page or create one
-            whatsapp_page = None
-            for page in context.pages:
-                if 'web.whatsapp.com' in page.url:
-                    whatsapp_page = page
-                    logger.success(f"✅ Found WhatsApp tab: {page.url}")
-                    break
-            
-            if not whatsapp_page:
-                logger.warning("⚠️  WhatsApp Web not open. Opening it now...")
-                whatsapp_page = context.new_page()
-                whatsapp_page.goto('https://web.whatsapp.com')
-                logger.info("📱 Please scan QR code to login to WhatsApp Web")
-                time.sleep(10)
-            
-            logger.info("")
-            logger.info("=" * 70)
-            logger.info("🚀 Monitoring started!")
-            logger.info("=" * 70)
-            logger.info("Watching for Microsoft Forms links...")
-            logger.info("Press Ctrl+C to stop")
-            logger.info("")
-            
-            # Track processed URLs to avoid duplicates
-            processed_forms = set()
-            
-            # Monitor loop
-            while True:
-                try:
-                    # Get current page content
-                    page_text = whatsapp_page.inner_text('body')
-                    
-                    # Look for forms.office.com links
-                    form_url = extract_form_url(page_text)
-                    
-                    if form_url and form_url not in processed_forms:
-                        logger.success(f"\n🔔 NEW FORM DETECTED!")
-                        logger.info(f"URL: {form_url}\n")
-                        
-                        # Process the form
-                        success = fill_form_in_new_tab(context, form_url)
-                        
-                        if success:
-                            logger.success("✅ Form processed successfully!\n")
-                        else:
-                            logger.error("❌ Form processing failed!\n")
-                        
-                        # Mark as processed
-                        processed_forms.add(form_url)
-                        
-                        logger.info("Continuing to monitor...\n")
-                    
-                    # Wait before next check
-                    time.sleep(5)  # Check every 5 seconds
-                
-                except KeyboardInterrupt:
-                    logger.info("\n\n👋 Stopping monitor...")
-                    break
-                except Exception as e:
-                    logger.error(f"Error in monitor loop: {e}")
-                    time.sleep(10)
         
         except Exception as e:
             logger.warning(f"⚠️  Could not connect to Chrome: {e}")
             logger.info("Trying to launch Chrome automatically...")
             
+            browser = None
             if launch_chrome_debug():
-                browser = None
-                # Try connecting for 10 seconds
-                for i in range(10):
-                    try:
-                        logger.info(f"  Attempt {i+1}/10: Connecting to Chrome...")
-                        browser = p.chromium.connect_over_cdp("http://127.0.0.1:9222")
-                        logger.success("✅ Connected to Chrome!")
-                        break
-                    except Exception as connection_err:
-                        time.sleep(1)
-                
-                if browser:
-                    try:
-                        # Continue with existing logic (copied from above to avoid refactoring entire function structure)
-                        # Ideally this should be a loop or separate function, but keeping it simple for now
-                        contexts = browser.contexts
-                        if contexts:
-                            context = contexts[0]
-                            whatsapp_page = None
-                            for page in context.pages:
-                                if 'web.whatsapp.com' in page.url:
-                                    whatsapp_page = page
-                                    logger.success(f"✅ Found WhatsApp tab: {page.url}")
-                                    break
-                            
-                            if not whatsapp_page:
-                                whatsapp_page = context.new_page()
-                                whatsapp_page.goto('https://web.whatsapp.com')
-                            
-                            # Start monitoring loop
-                            logger.info("🚀 Monitoring started!")
-                            processed_forms = set()
-                            
-                            while True:
-                                try:
-                                    page_text = whatsapp_page.inner_text('body')
-                                    form_url = extract_form_url(page_text)
-                                    if form_url and form_url not in processed_forms:
-                                        logger.success(f"🔔 NEW FORM: {form_url}")
-                                        fill_form_in_new_tab(context, form_url)
-                                        processed_forms.add(form_url)
-                                    time.sleep(5)
-                                except KeyboardInterrupt:
-                                    break
-                                except Exception:
-                                    time.sleep(5)
-                                    
-                    except Exception as e2:
-                        logger.error(f"❌ Error during monitoring: {e2}")
-                else:
-                    logger.error("❌ Failed to connect to Chrome after launching. Maybe profile was not selected?")
+                # The debug port is already open, so one attempt is enough
+                try:
+                    logger.info("Connecting to Chrome...")
+                    browser = p.chromium.connect_over_cdp(CHROME_DEBUG_URL)
+                    logger.success("✅ Connected to Chrome!")
+                except Exception as connection_err:
+                    logger.error(f"❌ Failed to connect to Chrome after launching. Maybe profile was not selected? ({connection_err})")
             else:
-                 logger.error("❌ Auto-launch failed.")
+                logger.error("❌ Auto-launch failed.")
+        
+        if browser:
+            try:
+                run_monitor(browser)
+            except Exception as e:
+                logger.error(f"❌ Error during monitoring: {e}")
     
     logger.info("\n" + "=" * 70)
     logger.info("Monitor stopped")